@@ -0,0 +1,91 @@
+"""
+Measures rows/sec converting item_template rows to model arguments and back.
+
+"before" walks `model_fields` and re-resolves every field's enum/flag type
+for each row, the way `Item` converted rows prior to `CodecPlan`; "after"
+runs the compiled plan.
+
+    python -m benchmarks.bench_codec [rows]
+"""
+
+import sys
+import time
+
+from hogger.entities import Item, codec_plan
+from hogger.types import EnumMapUtils, EnumUtils, IntFlagUtils
+
+TYPE_CACHES = (
+    EnumUtils.enum_type,
+    EnumMapUtils.key_type,
+    IntFlagUtils.flag_type,
+    IntFlagUtils.members,
+)
+
+
+def sample_row() -> dict[str, any]:
+    return Item(
+        id=60000,
+        name="Hogger's Claw",
+        quality="Rare",
+        flags=["IsHeroic", "HasLoot"],
+        bagFamily=["Herbs"],
+        stats={"Agility": 5, "Stamina": 10},
+        resistances={"Fire": 3},
+    ).to_sql_dict()
+
+
+def reflect_from_sql(sql_dict: dict[str, any]) -> dict[str, any]:
+    args = {}
+    for cache in TYPE_CACHES:
+        cache.cache_clear()
+    for field, field_properties in Item.model_fields.items():
+        json_schema_extra = field_properties.json_schema_extra
+        if json_schema_extra is not None and "from_sql" in json_schema_extra:
+            args[field] = json_schema_extra["from_sql"](
+                sql_dict=sql_dict,
+                cursor=None,
+                field_type=field_properties.annotation,
+            )
+    return args
+
+
+def reflect_to_sql(model_dict: dict[str, any]) -> dict[str, any]:
+    args = {}
+    for field, field_properties in Item.model_fields.items():
+        json_schema_extra = field_properties.json_schema_extra
+        if json_schema_extra is not None and "to_sql" in json_schema_extra:
+            args = args | json_schema_extra["to_sql"](
+                model_field=field,
+                model_dict=model_dict,
+                cursor=None,
+                field_type=field_properties.annotation,
+            )
+    return args
+
+
+def rows_per_second(func, inputs: list) -> float:
+    start = time.perf_counter()
+    for i in inputs:
+        func(i)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def main(n: int = 20000) -> None:
+    plan = codec_plan(Item)
+    rows = [sample_row() for _ in range(n)]
+    models = [vars(Item(**plan.model_args(rows[0])))] * n
+
+    print(f"{'':<10}{'before':>14}{'after':>14}")
+    for name, before, after, inputs in (
+        ("from_sql", reflect_from_sql, plan.model_args, rows),
+        ("to_sql", reflect_to_sql, plan.sql_dict, models),
+    ):
+        print(
+            f"{name:<10}"
+            f"{rows_per_second(before, inputs):>10,.0f}r/s"
+            f"{rows_per_second(after, inputs):>10,.0f}r/s",
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
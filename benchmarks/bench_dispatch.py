@@ -0,0 +1,73 @@
+"""
+Measures how validating an entity scales with the number of entity types.
+
+A synthetic registry of entity types, each tagged by its `type` literal, is
+validated as "before", a plain union of every type that pydantic tries in turn
+the way `Manifest` dispatched prior to tagged unions, and as "after", the
+tagged union from `pydantic_annotation`. Entities of the first, middle and
+last registered type are timed separately.
+
+    python -m benchmarks.bench_dispatch [types] [entities]
+"""
+
+import sys
+import time
+from typing import Literal, Union
+
+from pydantic import BaseModel, TypeAdapter, create_model
+
+from hogger.util import pydantic_annotation
+
+
+class SyntheticEntity(BaseModel):
+    type: str
+    name: str
+    quality: int = 0
+    flags: list[str] = []
+
+
+def synthetic_registry(count: int) -> tuple[type, list[type]]:
+    """
+    Returns a new base class and its `count` tagged subclasses, Type0 to TypeN.
+    The subclasses must be kept referenced; `__subclasses__` only holds weak
+    references to them.
+    """
+    base = type("SyntheticBase", (SyntheticEntity,), {})
+    subclasses = [
+        create_model(f"Type{i}", __base__=base, type=(Literal[f"Type{i}"], ...))
+        for i in range(count)
+    ]
+    return base, subclasses
+
+
+def entities_per_second(adapter: TypeAdapter, tag: str, n: int) -> float:
+    entities = [
+        {"type": tag, "name": f"Synthetic {i}", "quality": i % 5, "flags": ["A"]}
+        for i in range(n)
+    ]
+    start = time.perf_counter()
+    adapter.validate_python(entities)
+    return n / (time.perf_counter() - start)
+
+
+def main(types: int = 50, n: int = 20000) -> None:
+    base, subclasses = synthetic_registry(types)
+    adapters = {
+        "before": TypeAdapter(list[Union[tuple(subclasses)]]),
+        "after": TypeAdapter(list[pydantic_annotation(base)]),
+    }
+    print(f"{types} entity types, {n:,} entities each")
+    for i in (0, types // 2, types - 1):
+        tag = f"Type{i}"
+        rates = {
+            label: entities_per_second(adapter, tag, n)
+            for label, adapter in adapters.items()
+        }
+        print(
+            f"  {tag:>7}: before {rates['before']:>9,.0f}/s  "
+            f"after {rates['after']:>9,.0f}/s",
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
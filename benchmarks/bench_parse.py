@@ -0,0 +1,41 @@
+"""
+Measures how quickly a manifest of synthetic items is validated.
+
+    python -m benchmarks.bench_parse [items]
+"""
+
+import sys
+import time
+
+from hogger.engine import Manifest
+
+
+def synthetic_entities(n: int) -> list[dict[str, any]]:
+    return [
+        {
+            "type": "Item",
+            "name": f"Synthetic Item {i}",
+            "itemClass": "Weapon",
+            "quality": ["Poor", "Common", "Uncommon", "Rare", "Epic"][i % 5],
+            "inventoryType": "Head",
+            "bonding": "OnEquip",
+            "material": i % 8,
+            "flags": ["IsHeroic", "HasLoot", i % 20],
+            "bagFamily": ["Herbs"],
+            "stats": {"Agility": i % 10, "Stamina": 10, "Spirit": 2},
+            "resistances": {"Fire": 3, "Frost": i % 7},
+        }
+        for i in range(n)
+    ]
+
+
+def main(n: int = 10000) -> None:
+    entities = synthetic_entities(n)
+    start = time.perf_counter()
+    Manifest(apiVersion="1.0.1", entities=entities)
+    elapsed = time.perf_counter() - start
+    print(f"validated {n:,} items in {elapsed:.2f}s ({n / elapsed:,.0f} items/s)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""
+Measures how long `hogger version` takes, from starting the interpreter to
+exiting, and which heavy modules it imported.
+
+    python -m benchmarks.bench_startup [runs]
+"""
+
+import subprocess
+import sys
+import time
+
+# Runs `hogger version` the way the console entry point does.
+VERSION_SCRIPT = "from hogger.cli import main; main()"
+
+# Modules only the subcommands need.
+HEAVY_MODULES = ("hogger.engine", "hogger.entities", "mysql.connector", "pydantic")
+
+
+def time_version(runs: int = 10) -> float:
+    """
+    Returns the fastest wall time, in seconds, of `runs` runs of
+    `hogger version`.
+    """
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", VERSION_SCRIPT, "version"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def heavy_imports() -> list[str]:
+    """
+    Returns the heavy modules imported by `hogger version`.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; {VERSION_SCRIPT}; "
+            f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])",
+            "version",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.splitlines()[-1].split()
+
+
+def main(runs: int = 10) -> None:
+    interpreter = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        interpreter = min(interpreter, time.perf_counter() - start)
+    print(f"interpreter:    {interpreter * 1000:.0f}ms")
+    print(f"hogger version: {time_version(runs) * 1000:.0f}ms")
+    print(f"heavy imports:  {heavy_imports() or 'none'}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1 @@
+VERSION = "v0.1.0"
@@ -1,7 +1,20 @@
-from .apply import apply
+from importlib import import_module
+
 from .main import main
 
 __all__ = [
     "apply",
     "main",
+    "plan",
 ]
+
+
+def __getattr__(name: str):
+    # The subcommands import the whole engine; only do so when they're used.
+    if name not in ("apply", "plan"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    command = getattr(import_module(f"{__name__}.{name}"), name)
+    # Importing the submodule bound its name on this package; rebind it to the
+    # command, as `from .apply import apply` would have.
+    globals()[name] = command
+    return command
@@ -1,15 +1,13 @@
+import os
+import sys
 from contextlib import ExitStack
 from functools import partial
 
-from hogger.engine import Manifest, WorldTable, get_hoggerfiles
+from hogger.engine import Manifest, PlanFile, WorldTable, discover_hoggerfiles
 from hogger.entities import EntityCodes
+from hogger.util import metrics
 
 
-# wt._write_hoggerstate(1, "Martin Fury", 17)
-# wt._write_hoggerstate(1, "Worn Shortsword", 25)
-# wt._write_hoggerstate(1, "Bent Staff", 35)
-# wt._write_hoggerstate(1, "Spellfire Belt#asdf", 21846)
-
 def apply(
     host: str,
     port: (int | str),
@@ -17,42 +15,168 @@ def apply(
     password: str,
     world: str,
     dir_or_file: str,
+    batch_rows: int = 1000,
+    batch_bytes: int = 1024 * 1024,
+    jobs: int = 1,
+    use_cache: bool = True,
+    cache_dir: str = ".hogger-cache",
+    stream: bool = False,
+    id_ranges: list[str] = None,
+    pool_size: int = 4,
+    diff_jobs: int = 1,
+    plan: str = "full",
+    plan_out: str = "-",
+    chunk_size: int = 0,
+    checkpoint: str = None,
+    watch: bool = False,
+    watch_interval: float = 0.5,
     **kwargs,
 ) -> None:
+    if watch and (PlanFile.is_plan(dir_or_file) or checkpoint is not None):
+        print("--watch applies hogger files; it can't apply plans or checkpoints.")
+        exit(1)
+
     # All of your database interactions through the WorldTable object.
     # Connect to WorldTable before bothering with parsing anything.
-    wt = WorldTable(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        database=world,
-    ) 
-
-    # Confirm unlocked, then Lock hogger.
-    if wt.is_locked():
-        # TODO: Can't do anything while it's not locked.
-        print("Hogger is locked.")
-        exit(1)
+    with metrics.phase("connect"):
+        wt = WorldTable(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database=world,
+            write_batch_rows=batch_rows,
+            write_batch_bytes=batch_bytes,
+            id_ranges=parse_id_ranges(id_ranges or []),
+            pool_size=pool_size,
+            diff_jobs=diff_jobs,
+        )
 
     # Enter an ExitStack to defer releasing hoggerlock.
     with ExitStack() as stack:
-        print("Acquiring hoggerlock.")
-        wt.acquire_lock()
-        stack.callback(wt.release_lock)
-        stack.callback(partial(print, "\nReleasing hoggerlock."))
-
-        # Load manifests and add them to the WorldTable object's desired state.
-        for hoggerfile in get_hoggerfiles(dir_or_file):
-            manifest = Manifest.from_file(hoggerfile)
-            wt.add_desired(*manifest.entities)
+        hold_lock(wt, stack)
 
-        pending = wt.stage()
-        print(pending)
+        if watch:
+            # Imported here, as it's only needed for watching.
+            from hogger.cli.watch import watch as watch_files
+
+            watch_files(
+                wt,
+                stack,
+                dir_or_file,
+                jobs=jobs,
+                use_cache=use_cache,
+                cache_dir=cache_dir,
+                plan=plan,
+                plan_out=plan_out,
+                chunk_size=chunk_size,
+                interval=watch_interval,
+            )
+            return
+
+        # A plan file written by `hogger plan`, or the checkpoint of an
+        # interrupted run, is applied as it was staged; anything else is
+        # parsed and staged against the world database now.
+        plan_file = None
+        if PlanFile.is_plan(dir_or_file):
+            plan_file = dir_or_file
+        elif checkpoint is not None and PlanFile.is_plan(checkpoint):
+            print(f"Resuming from checkpoint {checkpoint}.")
+            plan_file = checkpoint
+        else:
+            add_desired(wt, dir_or_file, jobs, use_cache, cache_dir, stream)
+            wt.stage()
+            if checkpoint is not None:
+                wt.save_plan(checkpoint)
+                plan_file = checkpoint
+
+        if plan_file is not None:
+            try:
+                wt.load_plan(plan_file)
+            except PlanFile.Stale as e:
+                print(e)
+                exit(1)
+        write_plan(wt, stack, plan, plan_out)
 
         # response = input("\nApply these changes? (yes/no) ")
         response = "yes"
         if response == "yes":
-            wt.apply()
+            wt.apply(chunk_size=chunk_size)
+            if checkpoint is not None and plan_file == checkpoint:
+                os.remove(checkpoint)
         else:
             print("Exiting")
+
+
+def hold_lock(wt: WorldTable, stack: ExitStack) -> None:
+    """
+    Acquires hoggerlock until `stack` is closed, or exits if it's held by
+    another run.
+    """
+    print("Acquiring hoggerlock.")
+    if not wt.acquire_lock():
+        # TODO: Can't do anything while it's not locked.
+        print("Hogger is locked.")
+        exit(1)
+    stack.callback(wt.release_lock)
+    stack.callback(partial(print, "\nReleasing hoggerlock."))
+
+
+@metrics.timed("parse")
+def add_desired(
+    wt: WorldTable,
+    dir_or_file: str,
+    jobs: int,
+    use_cache: bool,
+    cache_dir: str,
+    stream: bool,
+) -> None:
+    """
+    Loads manifests and adds them to the WorldTable object's desired state.
+    """
+    # Directories are read across as many threads as files are parsed with
+    # processes.
+    hoggerfiles = discover_hoggerfiles(dir_or_file, threads=jobs or os.cpu_count())
+    if stream:
+        for hoggerfile in hoggerfiles:
+            for entity in Manifest.iter_file(hoggerfile.path):
+                wt.add_desired(entity)
+    else:
+        cache = Manifest.parse_cache(cache_dir) if use_cache else None
+        for manifest in Manifest.from_files(
+            [hoggerfile.path for hoggerfile in hoggerfiles],
+            jobs=jobs,
+            cache=cache,
+            stats=[f.stat for f in hoggerfiles],
+        ):
+            wt.add_desired(*manifest.entities)
+
+
+def write_plan(wt: WorldTable, stack: ExitStack, mode: str, plan_out: str) -> None:
+    out = sys.stdout
+    if plan_out != "-":
+        out = stack.enter_context(open(plan_out, "w"))
+    wt.write_plan(out, mode=mode)
+
+
+def parse_id_ranges(specs: list[str]) -> dict[int, tuple[int, int]]:
+    """
+    Parses `--id-range` values such as "Item=90000-99999" into the inclusive
+    range of db_keys reserved for each entity code.
+    """
+    codes = {entity.__name__: code for code, entity in EntityCodes.items()}
+    ranges = {}
+    for spec in specs:
+        try:
+            name, bounds = spec.split("=")
+            low, high = map(int, bounds.split("-"))
+        except ValueError:
+            raise ValueError(
+                f"Invalid id range '{spec}'; expected e.g. 'Item=90000-99999'",
+            )
+        if name not in codes:
+            raise ValueError(
+                f"Invalid id range '{spec}'; unknown entity type '{name}'",
+            )
+        ranges[codes[name]] = (low, high)
+    return ranges
@@ -1,9 +1,7 @@
 import argparse
 import os
 
-from hogger.cli import apply
-
-VERSION = "v0.1.0"
+from hogger import VERSION
 
 
 def main():
@@ -12,43 +10,182 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="command", help="Subcommands")
 
-    # Subparser for the 'apply' command
-    apply_parser = subparsers.add_parser(
-        "apply",
-        help="Apply the files to the database",
-    )
-    apply_parser.add_argument(
-        "dir_or_file",
-        help="path to a file or folder where hogger should be invoked from",
-    )
-    apply_parser.add_argument(
+    # Arguments shared by the 'apply' and 'plan' commands
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
         "--host",
         help="Database hostname (default=localhost)",
         default=os.getenv("HOGGER_DB_HOST", "127.0.0.1"),
     )
-    apply_parser.add_argument(
+    common.add_argument(
         "--port",
         type=int,
         help="Database port (required)",
         default=os.getenv("HOGGER_DB_PORT", "3306"),
     )
-    apply_parser.add_argument(
+    common.add_argument(
         "--user",
         help="Database username (required)",
         default=os.getenv("HOGGER_DB_USER", "acore"),
     )
-    apply_parser.add_argument(
+    common.add_argument(
         "--pass",
         dest="password",
         help="Database password (optional)",
         default=os.getenv("HOGGER_DB_PASS", "acore"),
     )
-    apply_parser.add_argument(
+    common.add_argument(
         "--world",
         dest="world",
         help="name of the world database",
         default=os.getenv("HOGGER_DB_WORLD", "acore_world"),
     )
+    common.add_argument(
+        "--pool-size",
+        type=int,
+        help="Number of database connections used to load the world's actual "
+        "state concurrently (default=4)",
+        default=int(os.getenv("HOGGER_DB_POOL_SIZE", "4")),
+    )
+    common.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of processes used to parse hogger files; 0 uses every CPU "
+        "(default=1)",
+        default=1,
+    )
+    common.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse hogger files one entity at a time to bound memory use on "
+        "very large files; ignores --jobs and the parse cache",
+    )
+    common.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Parse every hogger file, bypassing the parse cache",
+    )
+    common.add_argument(
+        "--cache-dir",
+        help="Directory of the parse cache (default=.hogger-cache)",
+        default=os.getenv("HOGGER_CACHE_DIR", ".hogger-cache"),
+    )
+    common.add_argument(
+        "--diff-jobs",
+        type=int,
+        help="Number of processes used to diff large numbers of possibly "
+        "modified entities; 0 uses every CPU (default=1)",
+        default=1,
+    )
+    common.add_argument(
+        "--id-range",
+        dest="id_ranges",
+        action="append",
+        help="Range of db keys hogger may allocate for new entities of a type, "
+        "e.g. Item=90000-99999; may be repeated (default=60000 and up)",
+        default=[r for r in os.getenv("HOGGER_ID_RANGES", "").split(",") if r],
+    )
+    common.add_argument(
+        "--plan",
+        choices=["full", "changes", "summary", "jsonl"],
+        help="How the plan is printed: every entity, only the changes, only "
+        "the counts, or one JSON object per change (default=full)",
+        default="full",
+    )
+    common.add_argument(
+        "--plan-out",
+        help="File the plan is written to; - writes to stdout (default=-)",
+        default="-",
+    )
+
+    common.add_argument(
+        "--timings",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="Print the time spent in each phase, and counts of rows loaded, "
+        "statements executed, bytes sent and entities validated, once done; "
+        "or write them as JSON to FILE",
+        default=None,
+    )
+    common.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Run under cProfile and save the profile to FILE: for speedscope if "
+        "it ends in .json, for pstats otherwise",
+        default=None,
+    )
+
+    # Subparser for the 'apply' command
+    apply_parser = subparsers.add_parser(
+        "apply",
+        parents=[common],
+        help="Apply the files, or a plan file created by 'plan', to the database",
+    )
+    apply_parser.add_argument(
+        "dir_or_file",
+        help="path to a file or folder where hogger should be invoked from, or "
+        "to a plan file",
+    )
+    apply_parser.add_argument(
+        "--batch-rows",
+        type=int,
+        help="Maximum number of rows written per statement (default=1000)",
+        default=1000,
+    )
+    apply_parser.add_argument(
+        "--batch-bytes",
+        type=int,
+        help="Maximum size in bytes of each statement written (default=1MiB)",
+        default=1024 * 1024,
+    )
+    apply_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Number of entities written and committed per transaction; 0 "
+        "writes everything in one transaction (default=0)",
+        default=0,
+    )
+    apply_parser.add_argument(
+        "--checkpoint",
+        help="Save the staged plan to this file and checkpoint progress after "
+        "every chunk; if the file exists, resume applying it instead of "
+        "staging again",
+        default=None,
+    )
+
+    apply_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running after applying, and apply every change to the hogger "
+        "files as they're saved; ignores --stream",
+    )
+    apply_parser.add_argument(
+        "--watch-interval",
+        type=float,
+        help="Seconds between checks for changes when inotify is unavailable "
+        "(default=0.5)",
+        default=0.5,
+    )
+
+    # Subparser for the 'plan' command
+    plan_parser = subparsers.add_parser(
+        "plan",
+        parents=[common],
+        help="Stage the files against the database and save the plan to apply later",
+    )
+    plan_parser.add_argument(
+        "dir_or_file",
+        help="path to a file or folder where hogger should be invoked from",
+    )
+    plan_parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="File the plan is saved to",
+    )
 
     # Subparser for the 'destroy' command
     destroy_parser = subparsers.add_parser(
@@ -63,8 +200,20 @@ def main():
     )
 
     args = parser.parse_args()
+    # Subcommands are imported when they run, so that `version` and `--help`
+    # don't pay for importing the engine, the database driver and pydantic.
     if args.command == "apply":
-        apply(**vars(args))
+        from hogger.cli.apply import apply
+        from hogger.cli.profiling import instrumented
+
+        with instrumented(profile=args.profile, timings=args.timings):
+            apply(**vars(args))
+    elif args.command == "plan":
+        from hogger.cli.plan import plan
+        from hogger.cli.profiling import instrumented
+
+        with instrumented(profile=args.profile, timings=args.timings):
+            plan(**vars(args))
     elif args.command == "destroy":
         pass
     elif args.command == "version":
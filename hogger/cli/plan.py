@@ -0,0 +1,47 @@
+from contextlib import ExitStack
+
+from hogger.cli.apply import add_desired, hold_lock, parse_id_ranges, write_plan
+from hogger.engine import WorldTable
+from hogger.util import metrics
+
+
+def plan(
+    host: str,
+    port: (int | str),
+    user: str,
+    password: str,
+    world: str,
+    dir_or_file: str,
+    output: str,
+    jobs: int = 1,
+    use_cache: bool = True,
+    cache_dir: str = ".hogger-cache",
+    stream: bool = False,
+    id_ranges: list[str] = None,
+    pool_size: int = 4,
+    diff_jobs: int = 1,
+    plan: str = "full",
+    plan_out: str = "-",
+    **kwargs,
+) -> None:
+    with metrics.phase("connect"):
+        wt = WorldTable(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database=world,
+            id_ranges=parse_id_ranges(id_ranges or []),
+            pool_size=pool_size,
+            diff_jobs=diff_jobs,
+        )
+
+    # Hold hoggerlock while staging, so that the plan is computed against a
+    # consistent hoggerstate and ids are allocated safely.
+    with ExitStack() as stack:
+        hold_lock(wt, stack)
+        add_desired(wt, dir_or_file, jobs, use_cache, cache_dir, stream)
+        wt.stage()
+        write_plan(wt, stack, plan, plan_out)
+        wt.save_plan(output)
+        print(f"\nSaved plan to {output}.")
@@ -0,0 +1,100 @@
+import cProfile
+import json
+import pstats
+import sys
+from contextlib import contextmanager
+from typing import Iterator
+
+from hogger.util import metrics
+
+
+@contextmanager
+def instrumented(profile: str = None, timings: str = None) -> Iterator[None]:
+    """
+    Records metrics while a command runs if `timings` is given, printing them
+    as a table if it's "-", or writing them as JSON to the file it names, to
+    compare across releases.
+
+    If `profile` is given, the command is run under cProfile, and the profile
+    is written to that file: in speedscope's format if it ends in ".json", or
+    for pstats otherwise.
+    """
+    if timings is not None:
+        metrics.enable()
+    profiler = None
+    if profile is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        with metrics.phase("total"):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            if profile.endswith(".json"):
+                write_speedscope(pstats.Stats(profiler), profile)
+            else:
+                profiler.dump_stats(profile)
+            print(f"\nSaved profile to {profile}.", file=sys.stderr)
+        if timings == "-":
+            print(f"\n{metrics.report()}", file=sys.stderr)
+        elif timings is not None:
+            with open(timings, "w") as f:
+                json.dump(metrics.to_dict(), f, indent=2)
+            print(f"\nSaved timings to {timings}.", file=sys.stderr)
+
+
+def write_speedscope(stats: pstats.Stats, filepath: str) -> None:
+    """
+    Writes `stats` as a speedscope sampled profile.
+
+    cProfile records time per caller and callee rather than per stack, so each
+    function becomes one sample weighted by its own time, under the stack of
+    the callers it spent the most time being called from. Times per function
+    are exact; stacks are the most expensive path to each function.
+    """
+    entries = stats.stats
+    frames, frame_index = [], {}
+
+    def frame(func: tuple[str, int, str]) -> int:
+        if func not in frame_index:
+            filename, line, name = func
+            frame_index[func] = len(frames)
+            frames.append({"name": name, "file": filename, "line": line})
+        return frame_index[func]
+
+    samples, weights = [], []
+    for func, (_, _, self_time, _, callers) in entries.items():
+        if self_time <= 0:
+            continue
+        stack = [func]
+        while len(callers) > 0:
+            caller = max(callers, key=lambda c: callers[c][3])
+            if caller in stack or caller not in entries:
+                break
+            stack.append(caller)
+            callers = entries[caller][4]
+        samples.append([frame(f) for f in reversed(stack)])
+        weights.append(self_time)
+
+    with open(filepath, "w") as f:
+        json.dump(
+            {
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "exporter": "hogger",
+                "name": "hogger",
+                "shared": {"frames": frames},
+                "profiles": [
+                    {
+                        "type": "sampled",
+                        "name": "hogger",
+                        "unit": "seconds",
+                        "startValue": 0,
+                        "endValue": sum(weights),
+                        "samples": samples,
+                        "weights": weights,
+                    },
+                ],
+            },
+            f,
+        )
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+from contextlib import ExitStack
+from typing import IO
+
+from hogger.engine import HoggerFile, Manifest, ParseCache, Watcher, WorldTable
+from hogger.engine.watcher import Changes
+from hogger.entities import EntityCodes
+from hogger.util import metrics
+
+
+class WatchSession:
+    """
+    Keeps a WorldTable's desired state in step with a tree of hogger files as
+    they change.
+
+    Every file's entities are recorded, so that a changed file only replaces
+    its own entities in the desired state, and only those entities, along with
+    any the file no longer declares, need to be staged again.
+    """
+
+    def __init__(self, wt: WorldTable, cache: ParseCache = None) -> None:
+        self.wt = wt
+        self.cache = cache
+        # The entities each file declares, as (entity_code, hogger_id).
+        self._declared: dict[str, set[tuple[int, str]]] = {}
+        # The file each entity was last declared by.
+        self._owners: dict[tuple[int, str], str] = {}
+
+    @metrics.timed("parse")
+    def load(self, hoggerfiles: list[HoggerFile]) -> dict[int, set[str]]:
+        """
+        Parses `hoggerfiles`, replacing the entities they declared before in
+        the desired state. Returns the hogger_ids to stage, by entity code.
+
+        A file that fails to parse is reported and keeps its previous
+        entities.
+        """
+        scope: dict[int, set[str]] = {}
+        for hoggerfile in hoggerfiles:
+            try:
+                manifest = Manifest.from_file(
+                    hoggerfile.path,
+                    cache=self.cache,
+                    stat=hoggerfile.stat,
+                )
+            except Exception as e:
+                print(f"Unable to parse {hoggerfile.path}:\n{e}", file=sys.stderr)
+                continue
+            self._forget(hoggerfile.path, scope)
+            declared = set()
+            for entity in manifest.entities:
+                key = (EntityCodes(type(entity)), entity.hogger_identifier())
+                declared.add(key)
+                self._owners[key] = hoggerfile.path
+                scope.setdefault(key[0], set()).add(key[1])
+            self.wt.add_desired(*manifest.entities)
+            self._declared[hoggerfile.path] = declared
+        return scope
+
+    def remove(self, paths: list[str]) -> dict[int, set[str]]:
+        """
+        Removes the entities declared by the files at `paths` from the desired
+        state. Returns the hogger_ids to stage, by entity code.
+        """
+        scope: dict[int, set[str]] = {}
+        for path in paths:
+            self._forget(path, scope)
+        return scope
+
+    def _forget(self, path: str, scope: dict[int, set[str]]) -> None:
+        for key in self._declared.pop(path, ()):
+            # An entity since declared by another file stays desired.
+            if self._owners.get(key) != path:
+                continue
+            del self._owners[key]
+            self.wt.remove_desired(*key)
+            scope.setdefault(key[0], set()).add(key[1])
+
+
+def watch(
+    wt: WorldTable,
+    stack: ExitStack,
+    dir_or_file: str,
+    jobs: int = 1,
+    use_cache: bool = True,
+    cache_dir: str = ".hogger-cache",
+    plan: str = "full",
+    plan_out: str = "-",
+    chunk_size: int = 0,
+    interval: float = 0.5,
+) -> None:
+    """
+    Applies the hogger files under `dir_or_file`, then applies every change to
+    them as they're saved, until interrupted. The WorldTable, its connection
+    and the hoggerstate loaded from it are kept for the whole session.
+    """
+    out = sys.stdout
+    if plan_out != "-":
+        out = stack.enter_context(open(plan_out, "w"))
+    session = WatchSession(wt, Manifest.parse_cache(cache_dir) if use_cache else None)
+    watcher = stack.enter_context(
+        Watcher(dir_or_file, interval=interval, threads=jobs or os.cpu_count()),
+    )
+
+    session.load(watcher.files)
+    wt.stage()
+    wt.write_plan(out, mode=plan)
+    wt.apply(chunk_size=chunk_size)
+
+    print(
+        f"\nWatching {dir_or_file} for changes ({watcher.backend}); press Ctrl+C "
+        "to stop.",
+    )
+    try:
+        while True:
+            changes = watcher.wait()
+            try:
+                apply_changes(session, changes, out, plan, chunk_size)
+            except Exception as e:
+                # One bad save mustn't end the session; the next one is
+                # applied as usual, without anything written before the error.
+                print(f"Unable to apply changes:\n{e}", file=sys.stderr)
+                wt.rollback()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def apply_changes(
+    session: WatchSession,
+    changes: Changes,
+    out: IO[str],
+    plan: str,
+    chunk_size: int,
+) -> None:
+    start = time.perf_counter()
+    scope = session.load(changes.changed)
+    for entity_code, hogger_ids in session.remove(changes.removed).items():
+        scope.setdefault(entity_code, set()).update(hogger_ids)
+    session.wt.stage(scope)
+    session.wt.write_plan(out, mode=plan)
+    session.wt.apply(chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    files = len(changes.changed) + len(changes.removed)
+    print(f"Applied {files} changed file(s) in {elapsed * 1000:.0f}ms.")
@@ -1,12 +1,40 @@
+from .batch_writer import BatchWriter
+from .discovery import HoggerFile, discover_hoggerfiles
+from .id_allocator import IdAllocator
 from .manifest import Manifest
+from .parse_cache import ParseCache
+from .plan_file import PlanFile
+from .plan_writer import PlanWriter
+from .row_store import RowStore
+from .statements import Statements
 from .util import get_hoggerfiles
+from .watcher import Watcher
 from .world_table import WorldTable
 
 __all__ = [
+    # batch_writer
+    "BatchWriter",
+    # discovery
+    "HoggerFile",
+    "discover_hoggerfiles",
+    # id_allocator
+    "IdAllocator",
     # manifest
     "Manifest",
+    # parse_cache
+    "ParseCache",
+    # plan_file
+    "PlanFile",
+    # plan_writer
+    "PlanWriter",
+    # row_store
+    "RowStore",
+    # statements
+    "Statements",
     # util
     "get_hoggerfiles",
+    # watcher
+    "Watcher",
     # world_table
     "WorldTable",
 ]
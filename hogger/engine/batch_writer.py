@@ -0,0 +1,68 @@
+from hogger.engine.statements import Statements
+
+
+class BatchWriter:
+    """
+    Collects rows destined for the world database, grouped by table and column
+    set, and writes each group as multi-row
+    `INSERT ... ON DUPLICATE KEY UPDATE` statements.
+
+    A statement is flushed once it holds `max_rows` rows, or once adding a row
+    would push its estimated size past `max_bytes`. Keep `max_bytes` below the
+    server's `max_allowed_packet`. `max_rows` is further capped by the number
+    of placeholders a prepared statement may hold.
+    """
+
+    def __init__(
+        self,
+        statements: Statements,
+        max_rows: int = 1000,
+        max_bytes: int = 1024 * 1024,
+    ) -> None:
+        self._statements = statements
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self._pending: dict[tuple[str, tuple[str, ...]], list[tuple]] = {}
+        self._pending_bytes: dict[tuple[str, tuple[str, ...]], int] = {}
+        self.statements_executed = 0
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.flush()
+
+    def add(self, table: str, row: dict[str, any]) -> None:
+        key = (table, tuple(row.keys()))
+        values = tuple(row.values())
+        size = _estimate_size(values)
+
+        pending = self._pending.setdefault(key, [])
+        if len(pending) > 0 and (
+            len(pending) >= min(self.max_rows, Statements.max_rows(key[1]))
+            or self._pending_bytes[key] + size > self.max_bytes
+        ):
+            self._flush(key)
+            pending = self._pending.setdefault(key, [])
+        pending.append(values)
+        self._pending_bytes[key] = self._pending_bytes.get(key, 0) + size
+
+    def flush(self) -> None:
+        for key in list(self._pending.keys()):
+            self._flush(key)
+
+    def _flush(self, key: tuple[str, tuple[str, ...]]) -> None:
+        rows = self._pending.pop(key, [])
+        self._pending_bytes.pop(key, None)
+        if len(rows) == 0:
+            return
+
+        table, columns = key
+        self.statements_executed += self._statements.upsert(table, columns, rows)
+
+
+def _estimate_size(values: tuple) -> int:
+    # Approximates the bytes a row adds to the statement once the connector has
+    # escaped and interpolated its values: the literal, quotes and separator.
+    return sum(len(str(value)) + 3 for value in values) + 3
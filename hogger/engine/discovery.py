@@ -0,0 +1,210 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+# Files whose patterns exclude paths from discovery, read in every directory.
+IGNORE_FILES = (".gitignore", ".hoggerignore")
+
+# Directories that are never searched.
+ALWAYS_IGNORED = frozenset({".git"})
+
+# Filesystems record mtimes with a granularity of up to 2 seconds, so a file
+# modified more recently than that can be saved again without its stat changing.
+MTIME_GRANULARITY_NS = 2_000_000_000
+
+
+class HoggerFile(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    ino: int = 0
+    ctime_ns: int = 0
+
+    @staticmethod
+    def from_stat(path: str, stat: os.stat_result) -> "HoggerFile":
+        return HoggerFile(
+            path,
+            stat.st_mtime_ns,
+            stat.st_size,
+            stat.st_ino,
+            stat.st_ctime_ns,
+        )
+
+    @property
+    def stat(self) -> tuple[int, int, int, int]:
+        return (self.mtime_ns, self.size, self.ino, self.ctime_ns)
+
+    def is_racy(self, now_ns: int) -> bool:
+        """
+        Whether the file was modified so shortly before `now_ns` that it may
+        be saved again with the same stat.
+        """
+        return self.mtime_ns >= now_ns - MTIME_GRANULARITY_NS
+
+
+class IgnoreRule(NamedTuple):
+    base: str
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+
+
+def discover_hoggerfiles(
+    dir_or_file: str,
+    threads: int = 1,
+    ignore_files: tuple[str, ...] = IGNORE_FILES,
+) -> list[HoggerFile]:
+    """
+    Finds the hogger files under `dir_or_file`, sorted by path, along with the
+    stat they were found with.
+
+    Directories are read with `os.scandir`, one level at a time. As with
+    `os.walk`, symlinked directories aren't followed, and directories that
+    can't be read are skipped. Paths matching the gitignore-style patterns of
+    an `ignore_files` file apply to its own directory and below, and ignored
+    directories aren't descended into. When `threads` is greater than 1, the
+    directories of each level are read across that many threads.
+    """
+    return scan_tree(dir_or_file, threads, ignore_files)[0]
+
+
+def scan_tree(
+    dir_or_file: str,
+    threads: int = 1,
+    ignore_files: tuple[str, ...] = IGNORE_FILES,
+) -> tuple[list[HoggerFile], list[str]]:
+    """
+    Like `discover_hoggerfiles`, but also returns every directory that was
+    searched, in the order they were read.
+    """
+    if os.path.isfile(dir_or_file):
+        path = os.path.abspath(dir_or_file)
+        return [HoggerFile.from_stat(path, os.stat(path))], []
+    if not os.path.isdir(dir_or_file):
+        raise Exception("Path provided is neither a dir, nor a file.")
+
+    found, searched = [], []
+    level = [(os.path.abspath(dir_or_file), ())]
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as executor:
+        map_ = map if threads <= 1 else executor.map
+        while len(level) > 0:
+            searched.extend(directory for directory, _ in level)
+            next_level = []
+            for files, subdirs in map_(
+                lambda job: _scan(*job, ignore_files=ignore_files),
+                level,
+            ):
+                found.extend(files)
+                next_level.extend(subdirs)
+            level = next_level
+    found.sort()
+    return found, searched
+
+
+def _scan(
+    directory: str,
+    rules: tuple[IgnoreRule, ...],
+    ignore_files: tuple[str, ...],
+) -> tuple[list[HoggerFile], list[tuple[str, tuple[IgnoreRule, ...]]]]:
+    """
+    Reads a single directory, returning the hogger files in it, and the
+    subdirectories to read next with the rules that apply to them.
+    """
+    for name in ignore_files:
+        rules += _read_rules(os.path.join(directory, name), directory)
+
+    files, subdirs = [], []
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        # As with os.walk, directories that can't be read are skipped.
+        return files, subdirs
+    with entries:
+        for entry in entries:
+            # Symlinked directories aren't followed, so links can't loop or
+            # find the same files twice.
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if is_dir and entry.name in ALWAYS_IGNORED:
+                continue
+            if _is_ignored(entry.path, is_dir, rules):
+                continue
+            if is_dir:
+                subdirs.append((entry.path, rules))
+            elif entry.name.endswith(".hogger") and entry.is_file():
+                files.append(HoggerFile.from_stat(entry.path, entry.stat()))
+    return files, subdirs
+
+
+def _is_ignored(path: str, is_dir: bool, rules: tuple[IgnoreRule, ...]) -> bool:
+    # As with git, the last matching pattern decides.
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        relative = os.path.relpath(path, rule.base).replace(os.sep, "/")
+        if rule.regex.match(relative):
+            ignored = not rule.negated
+    return ignored
+
+
+def _read_rules(filepath: str, base: str) -> tuple[IgnoreRule, ...]:
+    try:
+        with open(filepath) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ()
+
+    rules = []
+    for line in lines:
+        pattern = line.strip()
+        if pattern == "" or pattern.startswith("#"):
+            continue
+        negated = pattern.startswith("!")
+        pattern = pattern.removeprefix("!")
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # A pattern with a slash before its end is relative to the directory
+        # of the ignore file; otherwise it matches a name at any depth.
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        if pattern == "":
+            continue
+        regex = _translate(pattern)
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        rules.append(IgnoreRule(base, re.compile(f"{regex}$"), negated, dir_only))
+    return tuple(rules)
+
+
+def _translate(pattern: str) -> str:
+    """
+    Translates a gitignore glob into a regular expression, where `*` and `?`
+    don't match a slash, and `**` matches any number of directories.
+    """
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1 :]:
+            end = pattern.index("]", i + 1)
+            chars = pattern[i + 1 : end]
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            regex.append(f"[{chars}]")
+            i = end + 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(regex)
@@ -0,0 +1,127 @@
+from bisect import bisect_right
+from functools import cache
+
+from hogger.engine.statements import Statements
+from hogger.entities.entity_codes import EntityCodes
+
+# Keys are handed out from this range unless a narrower one is configured for
+# the entity code. Entries below it belong to the stock world database.
+DEFAULT_RANGE = (60000, 2**31 - 1)
+
+
+class IdAllocator:
+    """
+    Hands out db_keys for newly created entities.
+
+    The first time an entity code asks for keys, the keys already used within
+    its range are read with a single query over the indexed key column, and
+    turned into a list of free, inclusive `[low, high]` ranges. After that,
+    keys are taken from memory: `allocate` prefers the first free range that
+    fits the whole request, so entities created together get contiguous keys.
+
+    `ranges` maps entity codes to the range reserved for them, e.g. so that
+    teams sharing a world database never hand out each other's keys. Keys are
+    only allocated while hoggerlock is held, so concurrent runs of hogger
+    can't allocate the same key twice.
+    """
+
+    class RangeExhausted(Exception):
+        def __init__(self, entity_code: int, low: int, high: int, count: int):
+            entity_type = EntityCodes[entity_code].__name__
+            super().__init__(
+                f"Unable to allocate {count} db keys for {entity_type}; range "
+                f"[{low}, {high}] doesn't have enough unused keys left",
+            )
+
+    def __init__(
+        self,
+        statements: Statements,
+        ranges: dict[int, tuple[int, int]] = None,
+    ) -> None:
+        self._statements = statements
+        self._ranges = dict(ranges or {})
+        self._free: dict[int, list[list[int]]] = {}
+
+    def range(self, entity_code: int) -> tuple[int, int]:
+        return self._ranges.get(entity_code, DEFAULT_RANGE)
+
+    def allocate(self, entity_code: int, count: int) -> list[int]:
+        """
+        Returns `count` unused db_keys for entities of `entity_code`.
+        """
+        if count <= 0:
+            return []
+        free = self._free_ranges(entity_code)
+        if sum(high - low + 1 for low, high in free) < count:
+            low, high = self.range(entity_code)
+            raise IdAllocator.RangeExhausted(entity_code, low, high, count)
+
+        for i, (low, high) in enumerate(free):
+            if high - low + 1 >= count:
+                free[i][0] = low + count
+                if free[i][0] > high:
+                    del free[i]
+                return list(range(low, low + count))
+
+        # No single range is large enough; fill free ranges in key order.
+        keys = []
+        while len(keys) < count:
+            low, high = free[0]
+            take = min(count - len(keys), high - low + 1)
+            keys.extend(range(low, low + take))
+            free[0][0] = low + take
+            if free[0][0] > high:
+                del free[0]
+        return keys
+
+    def reserve(self, entity_code: int, keys: list[int]) -> None:
+        """
+        Marks `keys` as used, e.g. the db_keys pinned by desired entities.
+        """
+        free = self._free_ranges(entity_code)
+        for key in keys:
+            i = bisect_right(free, [key, float("inf")]) - 1
+            if i < 0 or free[i][1] < key:
+                continue
+            low, high = free[i]
+            pieces = [r for r in ([low, key - 1], [key + 1, high]) if r[0] <= r[1]]
+            free[i : i + 1] = pieces
+
+    def _free_ranges(self, entity_code: int) -> list[list[int]]:
+        if entity_code not in self._free:
+            self._free[entity_code] = self._load_free_ranges(entity_code)
+        return self._free[entity_code]
+
+    def _load_free_ranges(self, entity_code: int) -> list[list[int]]:
+        entity_type = EntityCodes[entity_code]
+        low, high = self.range(entity_code)
+        # Only the boundaries of runs of used keys are returned: the lowest
+        # and highest used key, and every key followed by a gap.
+        rows = self._statements.execute(
+            used_key_bounds_sql(entity_type.db_table, entity_type.db_key_column),
+            (low, high),
+        ).fetchall()
+
+        free = []
+        start = low
+        for key, prev_key, next_key in sorted(rows):
+            if prev_key is None and key > start:
+                free.append([start, key - 1])
+            if next_key is None:
+                start = key + 1
+            elif next_key > key + 1:
+                free.append([key + 1, next_key - 1])
+        free.append([start, high])
+        return [r for r in free if r[0] <= r[1]]
+
+
+@cache
+def used_key_bounds_sql(table: str, key_column: str) -> str:
+    return (
+        f"SELECT k, prev_k, next_k FROM ("
+        f"SELECT `{key_column}` AS k, "
+        f"LAG(`{key_column}`) OVER (ORDER BY `{key_column}`) AS prev_k, "
+        f"LEAD(`{key_column}`) OVER (ORDER BY `{key_column}`) AS next_k "
+        f"FROM `{table}` WHERE `{key_column}` BETWEEN %s AND %s"
+        f") AS used WHERE prev_k IS NULL OR next_k IS NULL OR next_k > k + 1"
+    )
@@ -1,24 +1,143 @@
-import json
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial
+from typing import Iterator
 
 import yaml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
+from hogger.engine.parse_cache import ParseCache
+from hogger.engine.yaml_stream import SafeDumper, SafeLoader, iter_sequence
 from hogger.entities import Entity
-from hogger.util.utils import pydantic_annotation
+from hogger.util import metrics
+from hogger.util.utils import pydantic_annotation, subclass_registry
 
+# Every entity type a hogger file may declare, by its `type`.
+EntityTypes = subclass_registry(Entity)
 Entity = pydantic_annotation(Entity)
 
 
 class Manifest(BaseModel):
+    # The schema of the union of every entity type is costly to build, so it's
+    # built when the first manifest is validated rather than on import.
+    model_config = ConfigDict(defer_build=True)
+
     apiVersion: str = Field(
         description="API version to use against the configuration file.",
     )
     entities: list[Entity]
 
     @staticmethod
-    def from_file(filepath: str) -> "Manifest":
-        with open(filepath, "r") as yaml_file:
-            return Manifest(**yaml.safe_load(yaml_file))
+    def from_file(
+        filepath: str,
+        cache: ParseCache = None,
+        stat: tuple[int, ...] = None,
+    ) -> "Manifest":
+        """
+        Parses and validates a hogger file. When a `cache` is given, a file
+        whose content was already parsed is validated from the JSON dump of its
+        manifest in the cache instead, which is much faster than parsing YAML.
+        If its `(mtime_ns, size, ino, ctime_ns)` is given as well and unchanged
+        since it was cached, the file isn't even read.
+        """
+        if cache is None:
+            with open(filepath, "rb") as yaml_file:
+                manifest = Manifest(**yaml.load(yaml_file, Loader=SafeLoader))
+            metrics.count("entities validated", len(manifest.entities))
+            return manifest
+
+        stat_key = None
+        if stat is not None:
+            stat_key = cache.stat_key(filepath, *stat)
+        if stat_key is not None:
+            key = cache.get(stat_key)
+            manifest = _cached(cache, key) if isinstance(key, str) else None
+            if manifest is not None:
+                metrics.count("parse cache hits")
+                return manifest
+
+        with open(filepath, "rb") as yaml_file:
+            content = yaml_file.read()
+        key = cache.key(content)
+        manifest = _cached(cache, key)
+        if manifest is None:
+            manifest = Manifest(**yaml.load(content, Loader=SafeLoader))
+            metrics.count("entities validated", len(manifest.entities))
+            cache.put(key, manifest.model_dump(mode="json"))
+        else:
+            metrics.count("parse cache hits")
+        if stat_key is not None:
+            cache.put(stat_key, key)
+        return manifest
+
+    @staticmethod
+    def iter_file(filepath: str) -> Iterator[Entity]:
+        """
+        Yields the validated entities of a hogger file one at a time, across
+        every document in the file, without loading the whole file first. Use
+        this for very large files.
+        """
+        adapter = _entity_adapter()
+        with open(filepath, "rb") as yaml_file:
+            for entity in iter_sequence(yaml_file, "entities"):
+                metrics.count("entities validated")
+                yield adapter.validate_python(entity)
+
+    @staticmethod
+    def from_files(
+        filepaths: list[str],
+        jobs: int = 1,
+        cache: ParseCache = None,
+        stats: list[tuple[int, ...]] = None,
+    ) -> Iterator["Manifest"]:
+        """
+        Yields the manifest of each file in `filepaths`, in the order given.
+        `stats` holds the `HoggerFile.stat` of each file, if known; see
+        `from_file`.
+
+        When `jobs` is greater than 1, files are parsed and validated across
+        that many worker processes; 0 uses one process per CPU.
+        """
+        from_file = partial(_from_file, cache)
+        if stats is None:
+            stats = [None] * len(filepaths)
+        if jobs == 0:
+            jobs = os.cpu_count()
+        if jobs <= 1 or len(filepaths) <= 1:
+            yield from map(from_file, filepaths, stats)
+            return
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for manifest, counters in executor.map(
+                partial(_from_file_in_worker, cache, metrics.enabled),
+                filepaths,
+                stats,
+                chunksize=max(1, len(filepaths) // (jobs * 4)),
+            ):
+                metrics.merge(counters)
+                yield manifest
+
+    @staticmethod
+    def parse_cache(directory: str = ".hogger-cache") -> ParseCache:
+        return ParseCache(directory=directory, fingerprint=Manifest.fingerprint())
+
+    @staticmethod
+    @cache
+    def fingerprint() -> str:
+        """
+        Digest of every entity type's fields, their annotations and defaults.
+        Changes to the entity schema invalidate previously cached manifests.
+        """
+        h = hashlib.sha256()
+        for EntityType in EntityTypes.values():
+            h.update(EntityType.__qualname__.encode())
+            for field, field_properties in EntityType.model_fields.items():
+                h.update(
+                    f"{field}:{field_properties.annotation}:"
+                    f"{field_properties.default!r}".encode(),
+                )
+        return h.hexdigest()
 
     def yaml_dump(
         self,
@@ -26,12 +145,58 @@ class Manifest(BaseModel):
         exclude_unset: bool = True,
     ) -> str:
         return yaml.dump(
-            json.loads(
-                self.model_dump_json(
-                    by_alias=by_alias,
-                    exclude_unset=exclude_unset,
-                ),
+            self.model_dump(
+                mode="json",
+                by_alias=by_alias,
+                exclude_unset=exclude_unset,
             ),
+            Dumper=SafeDumper,
             indent=2,
             sort_keys=False,
         )
+
+
+def _cached(cache: ParseCache, key: str) -> Manifest:
+    # Cached manifests are validated like any other, so a cache entry can't
+    # hold anything a hogger file couldn't.
+    dumped = cache.get(key)
+    if dumped is None:
+        return None
+    try:
+        return Manifest.model_validate(dumped)
+    except Exception:
+        cache.drop(key)
+        return None
+
+
+def _from_file(
+    cache: ParseCache,
+    filepath: str,
+    stat: tuple[int, ...],
+) -> Manifest:
+    return Manifest.from_file(filepath, cache=cache, stat=stat)
+
+
+def _from_file_in_worker(
+    cache: ParseCache,
+    record_metrics: bool,
+    filepath: str,
+    stat: tuple[int, ...],
+) -> tuple[Manifest, dict[str, int]]:
+    # The counters recorded while parsing are returned with the manifest, to be
+    # merged into those of the parent process.
+    if record_metrics:
+        metrics.enable()
+    before = metrics.counters()
+    manifest = Manifest.from_file(filepath, cache=cache, stat=stat)
+    counters = {
+        name: n - before.get(name, 0)
+        for name, n in metrics.counters().items()
+        if n != before.get(name, 0)
+    }
+    return manifest, counters
+
+
+@cache
+def _entity_adapter() -> TypeAdapter:
+    return TypeAdapter(Entity)
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import time
+
+from hogger import VERSION
+from hogger.engine.discovery import MTIME_GRANULARITY_NS
+
+
+class ParseCache:
+    """
+    An on-disk cache of parsed manifests, keyed by the content of the hogger
+    file they were parsed from, the version of hogger, and a fingerprint of the
+    entity schema. Any change to one of those produces a different key, so
+    stale entries are never read; they simply age out.
+
+    Entries are stored as JSON, so that reading a cache directory that came
+    with a content repository never runs code from it. Once the cache grows
+    past `max_bytes`, the least recently used entries are removed until it's
+    back under 90% of the limit.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".hogger-cache",
+        fingerprint: str = "",
+        max_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self._size: int = None
+
+    def key(self, content: bytes) -> str:
+        h = hashlib.sha256()
+        h.update(f"{VERSION}\0{self.fingerprint}\0".encode())
+        h.update(content)
+        return h.hexdigest()
+
+    def stat_key(
+        self,
+        filepath: str,
+        mtime_ns: int,
+        size: int,
+        ino: int = 0,
+        ctime_ns: int = 0,
+    ) -> str:
+        """
+        Key under which the content key of a file is recorded while its stat
+        is unchanged, so that it needn't be read and hashed again. Returns None
+        if the file was modified too recently for its stat to be trusted, since
+        it could still be saved again within the same mtime.
+        """
+        if mtime_ns >= time.time_ns() - MTIME_GRANULARITY_NS:
+            return None
+        h = hashlib.sha256()
+        h.update(f"{VERSION}\0{self.fingerprint}\0stat\0".encode())
+        h.update(os.path.abspath(filepath).encode())
+        h.update(f"\0{mtime_ns}\0{size}\0{ino}\0{ctime_ns}".encode())
+        return h.hexdigest()
+
+    def get(self, key: str) -> any:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = json.load(f)
+        except OSError:
+            return None
+        except ValueError:
+            # The entry is truncated or corrupt; it's a miss, and is dropped.
+            self.drop(key)
+            return None
+        try:
+            # Bump the mtime so eviction treats the entry as recently used.
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def drop(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def put(self, key: str, value: any) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((entry.path, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
@@ -0,0 +1,227 @@
+import json
+import os
+import uuid
+import zlib
+
+from pydantic_core import to_jsonable_python
+
+from hogger import VERSION
+from hogger.engine.row_store import StoredRow
+from hogger.entities.entity_codes import EntityCodes
+
+MAGIC = b"HOGGERPLAN\x02"
+
+
+class PlanFile:
+    """
+    A staged plan, serialized so that it can be computed on one machine and
+    applied later, e.g. during a short maintenance window.
+
+    Besides the staged entities, a plan records the fingerprint of the
+    hoggerstate it was staged against, and the db_keys it allocated for new
+    entities. Applying a plan is refused if the fingerprint no longer matches
+    the world database, since hogger has changed the world since the plan was
+    made, or if any of those db_keys have been taken in the meantime.
+
+    On disk, a plan is `MAGIC` followed by zlib-compressed JSON, holding every
+    staged entity as the row it writes to its table and its content_hash, so
+    that loading a plan never runs code from it, and applying it writes
+    exactly what was staged. A plan applied in chunks has its progress
+    checkpointed to a small JSON file next to it, `<plan>.progress`, after
+    every chunk.
+    """
+
+    class Stale(Exception):
+        def __init__(self, filepath: str, reason: str) -> None:
+            super().__init__(
+                f"Plan '{filepath}' is stale: {reason}. Create a new plan and "
+                "try again.",
+            )
+
+    def __init__(
+        self,
+        fingerprint: str,
+        created: dict[int, dict[str, any]],
+        modified: dict[int, dict[str, any]],
+        changes: dict[int, dict[str, dict]],
+        unchanged: dict[int, dict[str, any]],
+        deleted: dict[int, dict[str, any]],
+        rehashed: dict[int, dict[str, any]],
+        allocated: dict[int, list[int]],
+        version: str = VERSION,
+        id: str = None,
+    ) -> None:
+        self.fingerprint = fingerprint
+        self.created = created
+        self.modified = modified
+        self.changes = changes
+        self.unchanged = unchanged
+        self.deleted = deleted
+        self.rehashed = rehashed
+        self.allocated = allocated
+        self.version = version
+        self.id = id or uuid.uuid4().hex
+
+    def save(self, filepath: str) -> None:
+        data = {
+            "version": self.version,
+            "id": self.id,
+            "fingerprint": self.fingerprint,
+            "created": _dump_entities(self.created),
+            "modified": _dump_entities(self.modified),
+            "changes": to_jsonable_python(self.changes),
+            # Unchanged entities aren't kept by `stage`, only their hogger_ids.
+            "unchanged": {
+                entity_code: list(hogger_ids)
+                for entity_code, hogger_ids in self.unchanged.items()
+            },
+            "deleted": _dump_entities(self.deleted, hashed=False),
+            "rehashed": _dump_entities(self.rehashed),
+            "allocated": self.allocated,
+        }
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(zlib.compress(json.dumps(data).encode()))
+        os.replace(tmp_path, filepath)
+
+    @staticmethod
+    def load(filepath: str) -> "PlanFile":
+        with open(filepath, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic[:-1] != MAGIC[:-1]:
+                raise ValueError(f"'{filepath}' is not a hogger plan")
+            if magic != MAGIC:
+                raise PlanFile.Stale(filepath, "it was created by another hogger")
+            data = json.loads(zlib.decompress(f.read()))
+        if data["version"] != VERSION:
+            raise PlanFile.Stale(
+                filepath,
+                f"it was created by hogger {data['version']}, not {VERSION}",
+            )
+        return PlanFile(
+            fingerprint=data["fingerprint"],
+            created=_load_entities(data["created"]),
+            modified=_load_entities(data["modified"]),
+            changes={
+                int(entity_code): changes
+                for entity_code, changes in data["changes"].items()
+            },
+            unchanged={
+                int(entity_code): dict.fromkeys(hogger_ids)
+                for entity_code, hogger_ids in data["unchanged"].items()
+            },
+            deleted=_load_entities(data["deleted"]),
+            rehashed=_load_entities(data["rehashed"]),
+            allocated={
+                int(entity_code): keys
+                for entity_code, keys in data["allocated"].items()
+            },
+            version=data["version"],
+            id=data["id"],
+        )
+
+    @staticmethod
+    def is_plan(filepath: str) -> bool:
+        try:
+            with open(filepath, "rb") as f:
+                return f.read(len(MAGIC))[:-1] == MAGIC[:-1]
+        except (IsADirectoryError, FileNotFoundError):
+            return False
+
+    @staticmethod
+    def progress_path(filepath: str) -> str:
+        return f"{filepath}.progress"
+
+    @staticmethod
+    def read_progress(filepath: str, plan: "PlanFile") -> dict[str, any]:
+        """
+        Returns the checkpointed progress of applying `plan`, or None if it
+        hasn't been partly applied.
+        """
+        try:
+            with open(PlanFile.progress_path(filepath)) as f:
+                progress = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if progress.get("plan_id") != plan.id:
+            return None
+        return progress
+
+    @staticmethod
+    def write_progress(
+        filepath: str,
+        plan_id: str,
+        chunk_size: int,
+        chunks: int,
+        fingerprint: str,
+        next_fingerprint: str = None,
+    ) -> None:
+        """
+        Checkpoints that `chunks` chunks of the plan are committed, and that
+        hoggerstate has `fingerprint`. While the next chunk is being
+        committed, `next_fingerprint` is the fingerprint it will have after.
+        """
+        path = PlanFile.progress_path(filepath)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "plan_id": plan_id,
+                    "chunk_size": chunk_size,
+                    "chunks": chunks,
+                    "fingerprint": fingerprint,
+                    "next_fingerprint": next_fingerprint,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def remove_progress(filepath: str) -> None:
+        try:
+            os.remove(PlanFile.progress_path(filepath))
+        except FileNotFoundError:
+            pass
+
+
+def _dump_entities(
+    state: dict[int, dict[str, any]],
+    hashed: bool = True,
+) -> dict[int, dict[str, any]]:
+    # Each entity code's entities are stored as the column names of their
+    # table, one row of values per hogger_id, and the content_hash of each.
+    dumped = {}
+    for entity_code, entities in state.items():
+        columns, rows, hashes = None, {}, {}
+        for hogger_id, entity in entities.items():
+            row = entity.to_sql_dict()
+            if columns is None:
+                columns = list(row.keys())
+            rows[hogger_id] = [row[column] for column in columns]
+            if hashed:
+                hashes[hogger_id] = entity.content_hash()
+        dumped[entity_code] = {"columns": columns or [], "rows": rows}
+        if hashed:
+            dumped[entity_code]["hashes"] = hashes
+    return to_jsonable_python(dumped)
+
+
+def _load_entities(dumped: dict[str, dict[str, any]]) -> dict[int, dict[str, any]]:
+    # Entities are loaded as StoredRows, which write exactly the rows that
+    # were staged, rather than rebuilt as models from their rows.
+    state = {}
+    for entity_code, table in dumped.items():
+        entity_type = EntityCodes[int(entity_code)]
+        columns = tuple(table["columns"])
+        hashes = table.get("hashes", {})
+        state[int(entity_code)] = {
+            hogger_id: StoredRow(
+                entity_type,
+                columns,
+                tuple(row),
+                content_hash=hashes.get(hogger_id),
+            )
+            for hogger_id, row in table["rows"].items()
+        }
+    return state
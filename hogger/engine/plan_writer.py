@@ -0,0 +1,152 @@
+import json
+from typing import IO, Iterator
+
+from pydantic_core import to_jsonable_python
+
+from hogger.entities.entity_codes import EntityCodes
+
+MODES = ("full", "changes", "summary", "jsonl")
+
+
+class PlanWriter:
+    """
+    Renders a staged plan to a text stream, one line at a time as the staged
+    state is walked, so the plan is never held in memory as a whole.
+
+    Modes:
+        full:    every entity, including unchanged ones, then a summary.
+        changes: only entities to be created, modified or deleted, then a
+                 summary.
+        summary: only the number of entities per action.
+        jsonl:   one JSON object per created, modified or deleted entity,
+                 then one for the summary, for other tools to consume.
+    """
+
+    def __init__(self, stream: IO[str], mode: str = "full") -> None:
+        if mode not in MODES:
+            raise ValueError(f"Invalid plan mode '{mode}'; expected one of {MODES}")
+        self.stream = stream
+        self.mode = mode
+
+    def write(
+        self,
+        created: dict[int, dict[str, any]],
+        modified: dict[int, dict[str, any]],
+        changes: dict[int, dict[str, dict]],
+        unchanged: dict[int, dict[str, any]],
+        deleted: dict[int, dict[str, any]],
+    ) -> None:
+        lines = {
+            "full": self._text_lines,
+            "changes": self._text_lines,
+            "summary": self._summary_lines,
+            "jsonl": self._json_lines,
+        }[self.mode](created, modified, changes, unchanged, deleted)
+        for line in lines:
+            self.stream.write(line)
+            self.stream.write("\n")
+
+    def _text_lines(
+        self,
+        created: dict[int, dict[str, any]],
+        modified: dict[int, dict[str, any]],
+        changes: dict[int, dict[str, dict]],
+        unchanged: dict[int, dict[str, any]],
+        deleted: dict[int, dict[str, any]],
+    ) -> Iterator[str]:
+        yield "To be Created:"
+        yield from _entity_lines(created)
+
+        yield "\nTo Be Modified:"
+        for entity_code in modified:
+            entity_type = EntityCodes[entity_code].__name__
+            for hogger_id in modified[entity_code]:
+                yield f"  {entity_type}.{hogger_id}"
+                for f, delta in changes[entity_code][hogger_id].items():
+                    yield f"    {f}"
+                    # TODO: Format changes in a clearer fashion.
+                    yield f"      desired: {str(delta['desired'])}"
+                    yield f"      actual:  {str(delta['actual'])}"
+
+        if self.mode == "full":
+            yield "\nUnchanged:"
+            yield from _entity_lines(unchanged)
+
+        yield "\nTo Be Deleted:"
+        yield from _entity_lines(deleted)
+
+        yield ""
+        yield from self._summary_lines(created, modified, changes, unchanged, deleted)
+
+    def _summary_lines(
+        self,
+        created: dict[int, dict[str, any]],
+        modified: dict[int, dict[str, any]],
+        changes: dict[int, dict[str, dict]],
+        unchanged: dict[int, dict[str, any]],
+        deleted: dict[int, dict[str, any]],
+    ) -> Iterator[str]:
+        counts = _counts(created, modified, unchanged, deleted)
+        yield (
+            f"Plan: {counts['create']} to create, {counts['modify']} to modify, "
+            f"{counts['delete']} to delete, {counts['unchanged']} unchanged."
+        )
+
+    def _json_lines(
+        self,
+        created: dict[int, dict[str, any]],
+        modified: dict[int, dict[str, any]],
+        changes: dict[int, dict[str, dict]],
+        unchanged: dict[int, dict[str, any]],
+        deleted: dict[int, dict[str, any]],
+    ) -> Iterator[str]:
+        for action, state in (
+            ("create", created),
+            ("modify", modified),
+            ("delete", deleted),
+        ):
+            for entity_code in state:
+                entity_type = EntityCodes[entity_code].__name__
+                for hogger_id, entity in state[entity_code].items():
+                    record = {
+                        "action": action,
+                        "type": entity_type,
+                        "id": hogger_id,
+                        "db_key": entity.get_db_key(),
+                    }
+                    if action == "modify":
+                        record["changes"] = changes[entity_code][hogger_id]
+                    yield _dumps(record)
+        yield _dumps(
+            {"action": "summary", **_counts(created, modified, unchanged, deleted)},
+        )
+
+
+def _entity_lines(state: dict[int, dict[str, any]]) -> Iterator[str]:
+    for entity_code in state:
+        entity_type = EntityCodes[entity_code].__name__
+        for hogger_id in state[entity_code]:
+            yield f"  {entity_type}.{hogger_id}"
+
+
+def _counts(
+    created: dict[int, dict[str, any]],
+    modified: dict[int, dict[str, any]],
+    unchanged: dict[int, dict[str, any]],
+    deleted: dict[int, dict[str, any]],
+) -> dict[str, int]:
+    return {
+        action: sum(len(entities) for entities in state.values())
+        for action, state in (
+            ("create", created),
+            ("modify", modified),
+            ("delete", deleted),
+            ("unchanged", unchanged),
+        )
+    }
+
+
+def _dumps(record: dict[str, any]) -> str:
+    # Changes hold field values as they are on the model: enums, nested
+    # models, and so on.
+    return json.dumps(to_jsonable_python(record, fallback=str))
@@ -0,0 +1,108 @@
+from typing import Iterator
+
+from hogger.entities import Entity
+
+
+class RowStore:
+    """
+    The rows of one entity type's table loaded from the world database, keyed
+    by hogger_id.
+
+    Rows are kept as the tuples the database returned, all sharing a single
+    tuple of column names, rather than as entity models with their nested
+    models, enums and lists. An entity is only built from its row when it's
+    looked up with `store[hogger_id]`.
+    """
+
+    __slots__ = ("entity_type", "column_names", "_index", "_key_index", "_rows")
+
+    def __init__(self, entity_type: type[Entity]) -> None:
+        self.entity_type = entity_type
+        self.column_names: tuple[str, ...] = ()
+        self._index: dict[str, int] = {}
+        self._key_index: int = None
+        self._rows: dict[str, tuple] = {}
+
+    def add(self, column_names: tuple[str, ...], hogger_id: str, row: tuple) -> None:
+        if column_names != self.column_names:
+            self.column_names = column_names
+            self._index = {column: i for i, column in enumerate(column_names)}
+            self._key_index = self._index[self.entity_type.db_key_column]
+        self._rows[hogger_id] = row
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, hogger_id: str) -> bool:
+        return hogger_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def keys(self):
+        return self._rows.keys()
+
+    def __getitem__(self, hogger_id: str) -> Entity:
+        return self.stored(hogger_id).materialize()
+
+    def stored(self, hogger_id: str) -> "StoredRow":
+        return StoredRow(self.entity_type, self.column_names, self._rows[hogger_id])
+
+    def db_key(self, hogger_id: str) -> int:
+        return self._rows[hogger_id][self._key_index]
+
+    def matches(self, hogger_id: str, sql_dict: dict[str, any]) -> bool:
+        """
+        Whether the stored row holds exactly the values of `sql_dict`, a row as
+        returned by `Entity.to_sql_dict`. A negative db_key in `sql_dict`
+        means the key isn't pinned, and matches any stored key.
+        """
+        row = self._rows[hogger_id]
+        key_column = self.entity_type.db_key_column
+        for column, value in sql_dict.items():
+            if column == key_column and value < 0:
+                continue
+            i = self._index.get(column)
+            if i is None or row[i] != value:
+                return False
+        return True
+
+
+class StoredRow:
+    """
+    A single row of a RowStore, standing in for an entity that is only needed
+    for its db_key, such as one that is about to be deleted, or for the row it
+    writes, such as one loaded from a plan file.
+    """
+
+    __slots__ = ("entity_type", "column_names", "row", "_content_hash")
+
+    def __init__(
+        self,
+        entity_type: type[Entity],
+        column_names: tuple[str, ...],
+        row: tuple,
+        content_hash: str = None,
+    ) -> None:
+        self.entity_type = entity_type
+        self.column_names = column_names
+        self.row = row
+        self._content_hash = content_hash
+
+    @property
+    def db_table(self) -> str:
+        return self.entity_type.db_table
+
+    def get_db_key(self) -> int:
+        return self.row[self.column_names.index(self.entity_type.db_key_column)]
+
+    def to_sql_dict(self) -> dict[str, any]:
+        return dict(zip(self.column_names, self.row))
+
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            self._content_hash = self.materialize().content_hash()
+        return self._content_hash
+
+    def materialize(self) -> Entity:
+        return self.entity_type.from_sql_rows(self.column_names, [self.row])[0]
@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from functools import cache
+
+from mysql.connector.connection_cext import CMySQLConnection as Connection
+from mysql.connector.cursor_cext import CMySQLCursorPrepared as PreparedCursor
+
+from hogger.util import chunked, metrics
+
+# MySQL refuses to prepare statements with more placeholders than this.
+MAX_PLACEHOLDERS = 65535
+
+
+class Statements:
+    """
+    Owns the parameterized statements hogger issues against the world database.
+
+    Statement text is built once per (table, column set, row count), and every
+    distinct statement is given its own prepared cursor, so a shape that is
+    executed repeatedly is only parsed by the server once per connection.
+    Values are always sent as parameters, never interpolated into the SQL.
+    """
+
+    def __init__(
+        self,
+        cnx: Connection,
+        max_prepared: int = 64,
+    ) -> None:
+        self._cnx = cnx
+        self._max_prepared = max_prepared
+        self._cursors: OrderedDict[str, PreparedCursor] = OrderedDict()
+
+    def execute(self, operation: str, params: tuple = ()) -> PreparedCursor:
+        cursor = self._prepared(operation)
+        cursor.execute(operation, params)
+        if metrics.enabled:
+            metrics.count("statements executed")
+            metrics.count("bytes sent", len(operation) + _params_size(params))
+        return cursor
+
+    def executemany(
+        self,
+        operation: str,
+        seq_params: list[tuple],
+    ) -> PreparedCursor:
+        cursor = self._prepared(operation)
+        cursor.executemany(operation, seq_params)
+        if metrics.enabled:
+            metrics.count("statements executed", len(seq_params))
+            metrics.count(
+                "bytes sent",
+                len(operation) + sum(_params_size(params) for params in seq_params),
+            )
+        return cursor
+
+    def close(self) -> None:
+        for cursor in self._cursors.values():
+            cursor.close()
+        self._cursors.clear()
+
+    def select_in(
+        self,
+        table: str,
+        key_column: str,
+        keys: list,
+    ) -> tuple[tuple[str, ...], list[tuple]]:
+        """
+        Reads every row of `table` whose `key_column` is in `keys`, returning
+        the column names and the rows.
+        """
+        column_names, rows = (), []
+        for chunk in chunked(keys, MAX_PLACEHOLDERS):
+            cursor = self.execute(select_in_sql(table, key_column, len(chunk)), chunk)
+            rows.extend(cursor.fetchall())
+            column_names = tuple(cursor.column_names)
+        return column_names, rows
+
+    def upsert(
+        self,
+        table: str,
+        columns: tuple[str, ...],
+        rows: list[tuple],
+        max_rows: int = None,
+    ) -> int:
+        """
+        Writes `rows` into `table` with multi-row
+        `INSERT ... ON DUPLICATE KEY UPDATE` statements, returning the number
+        of statements executed. Every full batch shares one prepared statement.
+        """
+        batch_size = self.max_rows(columns)
+        if max_rows is not None:
+            batch_size = min(batch_size, max_rows)
+
+        full_batches = len(rows) // batch_size
+        remainder = rows[full_batches * batch_size :]
+        if full_batches > 0:
+            self.executemany(
+                upsert_sql(table, columns, batch_size),
+                [
+                    _flatten(batch)
+                    for batch in chunked(rows[: full_batches * batch_size], batch_size)
+                ],
+            )
+        if len(remainder) > 0:
+            self.execute(
+                upsert_sql(table, columns, len(remainder)),
+                _flatten(remainder),
+            )
+        return full_batches + (len(remainder) > 0)
+
+    def delete_in(
+        self,
+        table: str,
+        key_column: str,
+        keys: list,
+        where: dict[str, any] = None,
+        max_keys: int = None,
+    ) -> int:
+        """
+        Deletes every row of `table` whose `key_column` is in `keys`, and whose
+        columns equal the values in `where`, with `DELETE ... IN (...)`
+        statements of at most `max_keys` keys each. Returns the number of
+        statements executed. Every full batch shares one prepared statement.
+        """
+        where = where or {}
+        where_columns = tuple(where.keys())
+        where_values = tuple(where.values())
+        batch_size = MAX_PLACEHOLDERS - len(where_columns)
+        if max_keys is not None:
+            batch_size = min(batch_size, max_keys)
+
+        full_batches = len(keys) // batch_size
+        remainder = keys[full_batches * batch_size :]
+        if full_batches > 0:
+            self.executemany(
+                delete_in_sql(table, key_column, where_columns, batch_size),
+                [
+                    (*where_values, *batch)
+                    for batch in chunked(keys[: full_batches * batch_size], batch_size)
+                ],
+            )
+        if len(remainder) > 0:
+            self.execute(
+                delete_in_sql(table, key_column, where_columns, len(remainder)),
+                (*where_values, *remainder),
+            )
+        return full_batches + (len(remainder) > 0)
+
+    @staticmethod
+    def max_rows(columns: tuple[str, ...]) -> int:
+        """
+        The most rows of `columns` a single prepared statement can carry.
+        """
+        return max(1, MAX_PLACEHOLDERS // len(columns))
+
+    def _prepared(self, operation: str) -> PreparedCursor:
+        cursor = self._cursors.get(operation)
+        if cursor is not None:
+            self._cursors.move_to_end(operation)
+            return cursor
+
+        cursor = self._cnx.cursor(prepared=True)
+        self._cursors[operation] = cursor
+        if len(self._cursors) > self._max_prepared:
+            _, evicted = self._cursors.popitem(last=False)
+            evicted.close()
+        return cursor
+
+
+@cache
+def select_in_sql(table: str, key_column: str, count: int) -> str:
+    placeholders = ", ".join(["%s"] * count)
+    return f"SELECT * FROM `{table}` WHERE `{key_column}` IN ({placeholders});"
+
+
+@cache
+def delete_in_sql(
+    table: str,
+    key_column: str,
+    where_columns: tuple[str, ...],
+    count: int,
+) -> str:
+    conditions = [f"`{column}` = %s" for column in where_columns]
+    conditions.append(f"`{key_column}` IN ({', '.join(['%s'] * count)})")
+    return f"DELETE FROM `{table}` WHERE {' AND '.join(conditions)};"
+
+
+@cache
+def upsert_sql(table: str, columns: tuple[str, ...], count: int) -> str:
+    column_list = ", ".join(f"`{column}`" for column in columns)
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    updates = ", ".join(f"`{column}`=VALUES(`{column}`)" for column in columns)
+    return (
+        f"INSERT INTO `{table}` ({column_list}) "
+        f"VALUES {', '.join([placeholders] * count)} "
+        f"ON DUPLICATE KEY UPDATE {updates};"
+    )
+
+
+def _flatten(rows: list[tuple]) -> tuple:
+    return tuple(value for row in rows for value in row)
+
+
+def _params_size(params: tuple) -> int:
+    # Approximates the bytes the parameters of a statement are sent as.
+    return sum(len(str(value)) for value in params)
@@ -0,0 +1,207 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import time
+from typing import NamedTuple
+
+from hogger.engine.discovery import HoggerFile, scan_tree
+
+# inotify(7) flags.
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+
+
+class Changes(NamedTuple):
+    # Hogger files that were added or modified.
+    changed: list[HoggerFile]
+    # Paths of hogger files that were removed.
+    removed: list[str]
+
+
+class Watcher:
+    """
+    Watches the hogger files under `dir_or_file` for changes.
+
+    On Linux, every searched directory is watched with inotify, and `wait`
+    blocks until one of them changes. Elsewhere, or if inotify is unavailable,
+    the tree is polled every `interval` seconds. Either way, changes are found
+    by searching the tree again and comparing the stat of every hogger file
+    with the last search, so ignore files are honoured and spurious events are
+    discarded. Files modified too recently for their stat to be trusted are
+    compared by content as well.
+    """
+
+    def __init__(
+        self,
+        dir_or_file: str,
+        interval: float = 0.5,
+        debounce: float = 0.05,
+        threads: int = 1,
+        use_inotify: bool = True,
+    ) -> None:
+        self.dir_or_file = dir_or_file
+        self.interval = interval
+        # Editors often save with several writes, or by renaming a temporary
+        # file; events arriving within `debounce` seconds are handled at once.
+        self.debounce = debounce
+        self.threads = threads
+        self._libc = None
+        self._fd: int = None
+        self._watched: dict[str, int] = {}
+        if use_inotify:
+            self._init_inotify()
+        self._files: dict[str, HoggerFile] = {}
+        # Digests of the files that were racy at the last search; see
+        # `HoggerFile.is_racy`.
+        self._digests: dict[str, bytes] = {}
+        self._search()
+
+    @property
+    def backend(self) -> str:
+        return "polling" if self._fd is None else "inotify"
+
+    @property
+    def files(self) -> list[HoggerFile]:
+        return sorted(self._files.values())
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def wait(self, timeout: float = None) -> Changes:
+        """
+        Blocks until hogger files are added, modified or removed, returning
+        the changes, or None once `timeout` seconds have passed without any.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            if self._fd is None:
+                delay = self.interval
+                if remaining is not None:
+                    delay = min(delay, remaining)
+                time.sleep(delay)
+            elif self._wait_for_events(remaining):
+                time.sleep(self.debounce)
+                self._drain_events()
+
+            changes = self._search()
+            if len(changes.changed) > 0 or len(changes.removed) > 0:
+                return changes
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    def _search(self) -> Changes:
+        now_ns = time.time_ns()
+        try:
+            found, directories = scan_tree(self.dir_or_file, threads=self.threads)
+        except Exception:
+            # The watched file or directory was removed, perhaps mid-search.
+            found, directories = [], []
+        if not os.path.isdir(self.dir_or_file):
+            directories = [os.path.dirname(os.path.abspath(self.dir_or_file))]
+        self._watch(directories)
+
+        files = {hoggerfile.path: hoggerfile for hoggerfile in found}
+        changed, digests = [], {}
+        for path, hoggerfile in files.items():
+            if self._files.get(path) != hoggerfile:
+                changed.append(hoggerfile)
+                if hoggerfile.is_racy(now_ns):
+                    digests[path] = _digest(path)
+                continue
+            if path not in self._digests and not hoggerfile.is_racy(now_ns):
+                continue
+            # The stat is unchanged, but the file may have been saved again
+            # within the same mtime.
+            digest = _digest(path)
+            if self._digests.get(path, digest) != digest:
+                changed.append(hoggerfile)
+            if hoggerfile.is_racy(now_ns):
+                digests[path] = digest
+        changes = Changes(
+            changed=changed,
+            removed=sorted(self._files.keys() - files.keys()),
+        )
+        self._files = files
+        self._digests = digests
+        return changes
+
+    def _init_inotify(self) -> None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError, TypeError):
+            return
+        if fd >= 0:
+            self._libc, self._fd = libc, fd
+
+    def _watch(self, directories: list[str]) -> None:
+        if self._fd is None:
+            return
+        # Directories that are gone no longer have a watch, and are watched
+        # again if they're recreated.
+        searched = set(directories)
+        self._watched = {
+            directory: wd
+            for directory, wd in self._watched.items()
+            if directory in searched
+        }
+        for directory in directories:
+            if directory in self._watched:
+                continue
+            wd = self._libc.inotify_add_watch(
+                self._fd,
+                os.fsencode(directory),
+                WATCH_MASK,
+            )
+            if wd >= 0:
+                self._watched[directory] = wd
+
+    def _wait_for_events(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return len(readable) > 0
+
+    def _drain_events(self) -> None:
+        # The events themselves don't matter; the tree is searched again.
+        try:
+            while len(os.read(self._fd, 65536)) > 0:
+                pass
+        except BlockingIOError:
+            pass
+
+
+def _digest(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).digest()
+    except OSError:
+        return None
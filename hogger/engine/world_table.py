@@ -1,11 +1,29 @@
-import copy
+import hashlib
 import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from inspect import cleandoc
+from itertools import chain
+from typing import IO
 
 import mysql.connector
+import mysql.connector.pooling
+from mysql.connector.connection_cext import CMySQLConnection as Connection
+from mysql.connector.pooling import CNX_POOL_MAXSIZE
 
+from hogger.engine.batch_writer import BatchWriter
+from hogger.engine.id_allocator import IdAllocator
+from hogger.engine.plan_file import PlanFile
+from hogger.engine.plan_writer import PlanWriter
+from hogger.engine.row_store import RowStore
+from hogger.engine.statements import Statements
 from hogger.entities import Entity
 from hogger.entities.entity_codes import EntityCodes
+from hogger.util import chunked, metrics
+
+# Fewer candidates than this are always diffed in-process.
+PARALLEL_DIFF_MIN = 5000
 
 
 class State(dict[int, dict[str, (Entity | dict[str, any])]]):
@@ -21,29 +39,59 @@ class WorldTable:
         database: str,
         user: str,
         password: str,
+        load_chunk_size: int = 1000,
+        write_batch_rows: int = 1000,
+        write_batch_bytes: int = 1024 * 1024,
+        id_ranges: dict[int, tuple[int, int]] = None,
+        pool_size: int = 4,
+        diff_jobs: int = 1,
     ) -> None:
         super().__init__()
-        # Create a connection tied to the WorldTable object.
-        self._cnx = mysql.connector.connect(
-            host=host,
-            port=port,
-            database=database,
-            user=user,
-            password=password,
-        )
-        self._actual_state: State = self._get_actual_state()
+        # Maximum number of db_keys looked up per query when loading the
+        # actual state of the world database.
+        self._load_chunk_size = load_chunk_size
+        # Number of processes diffing large sets of candidate entities; 0 uses
+        # every CPU.
+        self._diff_jobs = diff_jobs
+        # Limits on the size of each multi-row statement issued by `apply`.
+        self._write_batch_rows = write_batch_rows
+        self._write_batch_bytes = write_batch_bytes
+        # Actual state is loaded over up to `pool_size` pooled connections at
+        # once. The pool is only opened once a load needs it; everything else
+        # goes through one connection tied to the WorldTable object.
+        self._pool_size = max(1, min(pool_size, CNX_POOL_MAXSIZE))
+        self._pool: mysql.connector.pooling.MySQLConnectionPool = None
+        self._cnx_config = {
+            "host": host,
+            "port": port,
+            "database": database,
+            "user": user,
+            "password": password,
+        }
+        self._cnx = mysql.connector.connect(**self._cnx_config)
+        self._statements = Statements(self._cnx)
+        # Allocates db_keys for created entities; `id_ranges` maps entity
+        # codes to the inclusive range of keys reserved for them.
+        self._id_allocator = IdAllocator(self._statements, ranges=id_ranges)
         self._desired_state: State = State()
         self._created = None
         self._modified = None
         self._changes = None
         self._unchanged = None
         self._deleted = None
+        self._rehashed = None
+        # db_keys handed out by the IdAllocator during `stage`, by entity code.
+        self._allocated: dict[int, list[int]] = {}
+        # The plan file and id of a plan loaded with `load_plan`, and, when
+        # resuming it, the chunk size and number of chunks already applied.
+        self._checkpoint: tuple[str, str] = None
+        self._resume: tuple[int, int] = None
 
         self.database = database
         if not self._cnx.is_connected():
             # TODO: Add better description
             raise Exception(f"Unable to connect to worldserver database '{database}'")
-        
+
         # Initialize the hoggerstate table if one doesn't already exist.
         with self._cnx.cursor() as cursor:
             cursor.execute(
@@ -52,18 +100,40 @@ class WorldTable:
                     entity_code INT NOT NULL,
                     hogger_identifier VARCHAR(128) NOT NULL,
                     db_key INT NOT NULL,
+                    content_hash CHAR(64) NULL,
                     PRIMARY KEY (entity_code, hogger_identifier)
                 );
                 """,
             )
+            # hoggerstate tables created by older versions of hogger lack the
+            # content_hash column.
             cursor.execute(
-                f"""
+                """
+                SELECT *
+                FROM information_schema.columns
+                WHERE table_schema = %s
+                    AND table_name = 'hoggerstate'
+                    AND column_name = 'content_hash'
+                LIMIT 1;
+                """,
+                (self.database,),
+            )
+            if len(cursor.fetchall()) == 0:
+                cursor.execute(
+                    """
+                    ALTER TABLE hoggerstate
+                    ADD COLUMN content_hash CHAR(64) NULL;
+                    """,
+                )
+            cursor.execute(
+                """
                 SELECT *
                 FROM information_schema.tables
-                WHERE table_schema = '{self.database}'
+                WHERE table_schema = %s
                     AND table_name = 'hoggerlock'
                 LIMIT 1;
                 """,
+                (self.database,),
             )
             exists = len(cursor.fetchall()) > 0
             if not exists:
@@ -82,6 +152,14 @@ class WorldTable:
                     """,
                 )
 
+        # The hoggerstate table maps each managed entity to its db_key and the
+        # content_hash it was last applied with. Entities themselves are only
+        # read from the world database by `stage`, and only when their
+        # content_hash shows they may have changed.
+        self._hoggerstate: State = self._get_hoggerstate()
+        self._hoggerstate_digest: int = None
+        self._actual_state: dict[int, RowStore] = {}
+
     def is_locked(self) -> bool:
         with self._cnx.cursor() as cursor:
             cursor.execute(
@@ -93,15 +171,21 @@ class WorldTable:
             # TODO: Raise error if this returns nil
             return bool(cursor.fetchone()[1])
 
-    def acquire_lock(self):
+    def acquire_lock(self) -> bool:
+        """
+        Locks hogger, returning False if another run already holds the lock.
+        Checking and setting the lock is a single statement, so two runs can't
+        both acquire it.
+        """
         with self._cnx.cursor() as cursor:
             cursor.execute(
                 """
-                REPLACE INTO hoggerlock(k, v)
-                VALUES ("locked", 1);
+                UPDATE hoggerlock SET v = 1
+                WHERE k = "locked" AND v = 0;
                 """,
             )
             self._cnx.commit()
+            return cursor.rowcount == 1
 
     def release_lock(self) -> None:
         with self._cnx.cursor() as cursor:
@@ -113,72 +197,173 @@ class WorldTable:
             )
             self._cnx.commit()
 
-    def _get_actual_state(self) -> State:
-        with self._cnx.cursor(buffered=True) as cursor:
-            cursor.execute(
-                """
-                SELECT entity_code, hogger_identifier, db_key
-                FROM hoggerstate;
-                """,
-            )
-        hoggerstates = cursor.fetchall()
-        actual = State()
-        for entity_code, hogger_identifier, db_key in hoggerstates:
-            actual[entity_code][hogger_identifier] = self.resolve_hoggerstate(
-                entity_code=entity_code,
-                hogger_identifier=hogger_identifier,
-                db_key=db_key,
-            )
+    def rollback(self) -> None:
+        """
+        Discards everything written since the last commit.
+        """
+        self._cnx.rollback()
+
+    @metrics.timed("load hoggerstate")
+    def _get_hoggerstate(self) -> State:
+        hoggerstates = self._statements.execute(
+            """
+            SELECT entity_code, hogger_identifier, db_key, content_hash
+            FROM hoggerstate;
+            """,
+        ).fetchall()
+
+        metrics.count("hoggerstate rows", len(hoggerstates))
+        hoggerstate = State()
+        for entity_code, hogger_identifier, db_key, content_hash in hoggerstates:
+            if entity_code not in EntityCodes:
+                self._warn_unknown_entity_code(entity_code)
+                continue
+            hoggerstate[entity_code][hogger_identifier] = (db_key, content_hash)
+        return hoggerstate
+
+    @metrics.timed("load actual state")
+    def _get_actual_state(
+        self,
+        hogger_ids: dict[int, list[str]],
+    ) -> dict[int, RowStore]:
+        """
+        Reads the rows of the entities identified by `hogger_ids`, keyed by
+        entity code, from the world database.
+        """
+        identifiers = {
+            entity_code: {
+                self._hoggerstate[entity_code][hogger_id][0]: hogger_id
+                for hogger_id in ids
+            }
+            for entity_code, ids in hogger_ids.items()
+        }
+        loaded = self._load_rows(
+            {entity_code: list(keys) for entity_code, keys in identifiers.items()},
+        )
+
+        actual = {
+            entity_code: RowStore(EntityType)
+            for entity_code, EntityType in EntityCodes.items()
+        }
+        for entity_code, results in loaded.items():
+            key_column = EntityCodes[entity_code].db_key_column
+            for column_names, rows in results:
+                if len(rows) == 0:
+                    continue
+                key_index = column_names.index(key_column)
+                for row in rows:
+                    hogger_id = identifiers[entity_code][row[key_index]]
+                    actual[entity_code].add(column_names, hogger_id, row)
         return actual
 
-    def resolve_hoggerstate(
+    def _load_rows(
         self,
-        entity_code: int,
-        hogger_identifier: str,
-        db_key: int,
-    ) -> Entity:
+        db_keys: dict[int, list[int]],
+    ) -> dict[int, list[tuple[tuple[str, ...], list[tuple]]]]:
         """
-        Gets all entities managed by Hogger from the world database.
+        Reads the rows with the given db_keys, by entity code, as a list of
+        `(column_names, rows)` results. Every entity type, and every chunk of
+        `load_chunk_size` keys within a type, is an independent query; they're
+        spread over the connection pool.
         """
-        if entity_code in EntityCodes:
-            return EntityCodes[entity_code].from_hoggerstate(
-                db_key=db_key,
-                hogger_identifier=hogger_identifier,
-                cursor=self._cnx.cursor(),
-            )
+        chunks = [
+            (entity_code, chunk)
+            for entity_code, keys in db_keys.items()
+            for chunk in chunked(keys, self._load_chunk_size)
+        ]
+        if self._pool_size == 1 or len(chunks) <= 1:
+            results = [
+                self._load_chunk(self._statements, entity_code, chunk)
+                for entity_code, chunk in chunks
+            ]
         else:
-            logging.warning(
-                cleandoc(
-                    f"""
-                    During parsing of hoggerstate table, encountered the
-                    entity_entity_code '{entity_code}', which isn't mappable to an
-                    entity type.
-
-                    It's possible that the hoggerstate table has entries
-                    that were created using a different version of Hogger.
-                    Make sure that you're using a version that is compatible
-                    with the version used to manage the hoggerstate table.
-                    Check your version of hogger using `hogger version`.
-                    """,
-                ),
-            )
-            return None
+            results = self._load_pooled(chunks)
 
-    def _write_hoggerstate(
+        loaded = {entity_code: [] for entity_code in db_keys}
+        for (entity_code, _), result in zip(chunks, results):
+            loaded[entity_code].append(result)
+            metrics.count("rows loaded", len(result[1]))
+
+        for entity_code, results in loaded.items():
+            EntityType = EntityCodes[entity_code]
+            found = set()
+            for column_names, rows in results:
+                if len(rows) == 0:
+                    continue
+                key_index = column_names.index(EntityType.db_key_column)
+                found.update(row[key_index] for row in rows)
+            if len(found) != len(db_keys[entity_code]):
+                missing = set(db_keys[entity_code]) - found
+                logging.warning(
+                    f"hoggerstate references {EntityType.__name__} rows that no "
+                    f"longer exist in '{EntityType.db_table}': {sorted(missing)}",
+                )
+        return loaded
+
+    def _load_pooled(
         self,
+        chunks: list[tuple[int, list[int]]],
+    ) -> list[tuple[tuple[str, ...], list[tuple]]]:
+        """
+        Loads `chunks` of `(entity_code, db_keys)` across the connection pool.
+        Each thread checks out one connection for the whole load, so that its
+        prepared statements are reused from chunk to chunk.
+        """
+        if self._pool is None:
+            self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                pool_size=self._pool_size,
+                **self._cnx_config,
+            )
+        local = threading.local()
+        checked_out: list[tuple[Connection, Statements]] = []
+
+        def load_chunk(chunk: tuple[int, list[int]]) -> tuple:
+            statements = getattr(local, "statements", None)
+            if statements is None:
+                cnx = self._pool.get_connection()
+                statements = local.statements = Statements(cnx)
+                checked_out.append((cnx, statements))
+            return self._load_chunk(statements, *chunk)
+
+        try:
+            workers = min(self._pool_size, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(load_chunk, chunks))
+        finally:
+            for cnx, statements in checked_out:
+                statements.close()
+                # Returns the connection to the pool.
+                cnx.close()
+
+    @staticmethod
+    def _load_chunk(
+        statements: Statements,
         entity_code: int,
-        hogger_identifier: str,
-        db_key: int,
-    ):
-        with self._cnx.cursor(buffered=True) as cursor:
-            cursor.execute(
+        db_keys: list[int],
+    ) -> tuple[tuple[str, ...], list[tuple]]:
+        EntityType = EntityCodes[entity_code]
+        return statements.select_in(
+            table=EntityType.db_table,
+            key_column=EntityType.db_key_column,
+            keys=db_keys,
+        )
+
+    def _warn_unknown_entity_code(self, entity_code: int) -> None:
+        logging.warning(
+            cleandoc(
                 f"""
-                REPLACE INTO hoggerstate (entity_code, hogger_identifier, db_key)
-                VALUES ({entity_code}, "{hogger_identifier}", {db_key});
-                """,
-            )
-            self._cnx.commit()
+                During parsing of hoggerstate table, encountered the
+                entity_entity_code '{entity_code}', which isn't mappable to an
+                entity type.
 
+                It's possible that the hoggerstate table has entries
+                that were created using a different version of Hogger.
+                Make sure that you're using a version that is compatible
+                with the version used to manage the hoggerstate table.
+                Check your version of hogger using `hogger version`.
+                """,
+            ),
+        )
 
     def add_desired(self, *entities: Entity) -> None:
         for entity in entities:
@@ -186,84 +371,496 @@ class WorldTable:
             hogger_identifier = entity.hogger_identifier()
             self._desired_state[entity_code][hogger_identifier] = entity
 
-    def _stage_str(self) -> str:
-        s: list[str] = []
-
-        s.append("To be Created:")
-        for entity_code in self._created:
-            entity_type = EntityCodes[entity_code].__name__
-            for hogger_id in self._created[entity_code]:
-                s.append(f"  {entity_type}.{hogger_id}")
-
-        s.append("\nTo Be Modified:")
-        for entity_code in self._modified:
-            entity_type = EntityCodes[entity_code].__name__
-            for hogger_id in self._modified[entity_code]:
-                s.append(f"  {entity_type}.{hogger_id}")
-                for f, delta in self._changes[entity_code][hogger_id].items():
-                    s.append(f"    {f}")
-                    # TODO: Format changes in a clearer fashion.
-                    s.append(f"      desired: {str(delta['desired'])}")
-                    s.append(f"      actual:  {str(delta['actual'])}")
-
-        s.append("\nUnchanged:")
-        for entity_code in self._unchanged:
-            entity_type = EntityCodes[entity_code].__name__
-            for hogger_id in self._unchanged[entity_code]:
-                s.append(f"  {entity_type}.{hogger_id}")
-
-        s.append("\nTo Be Deleted:")
-        for entity_code in self._deleted:
-            entity_type = EntityCodes[entity_code].__name__
-            for hogger_id in self._deleted[entity_code]:
-                s.append(f"  {entity_type}.{hogger_id}")
-
-        return "\n".join(s)
-
-    def stage(self) -> str:
+    def remove_desired(self, entity_code: int, hogger_identifier: str) -> None:
+        self._desired_state[entity_code].pop(hogger_identifier, None)
+
+    def fingerprint(self) -> str:
+        """
+        Digest of the hoggerstate table, which changes whenever hogger applies
+        anything to the world database.
+
+        The digest is the sum of a hash of every row, so `apply` can keep it
+        current as it writes rows rather than rehashing the whole table.
+        """
+        if self._hoggerstate_digest is None:
+            self._hoggerstate_digest = sum(
+                _row_digest(entity_code, hogger_id, db_key, content_hash)
+                for entity_code, rows in self._hoggerstate.items()
+                for hogger_id, (db_key, content_hash) in rows.items()
+            )
+        return f"{self._hoggerstate_digest % 2**256:064x}"
+
+    @metrics.timed("save plan")
+    def save_plan(self, filepath: str) -> None:
+        """
+        Writes the plan computed by `stage` to `filepath`, to be applied later
+        with `load_plan` and `apply`.
+        """
+        PlanFile(
+            fingerprint=self.fingerprint(),
+            created=self._created,
+            modified=self._modified,
+            changes=self._changes,
+            unchanged=self._unchanged,
+            deleted=self._deleted,
+            rehashed=self._rehashed,
+            allocated=self._allocated,
+        ).save(filepath)
+
+    @metrics.timed("load plan")
+    def load_plan(self, filepath: str) -> None:
+        """
+        Loads a plan written by `save_plan` in place of calling `stage`.
+
+        Raises PlanFile.Stale if hogger has changed the world database since
+        the plan was made, or if a db_key allocated by the plan has been taken
+        since.
+        """
+        plan = PlanFile.load(filepath)
+        progress = PlanFile.read_progress(filepath, plan)
+        if progress is not None:
+            # The plan was partly applied by an interrupted run. Since then,
+            # hoggerstate should only contain the chunks it committed, and the
+            # keys it allocated may already be in use by those chunks. If it
+            # was interrupted after committing a chunk, but before checkpointing
+            # it, hoggerstate has the fingerprint expected after that chunk.
+            chunks = progress["chunks"]
+            if progress["fingerprint"] != self.fingerprint():
+                if progress.get("next_fingerprint") != self.fingerprint():
+                    raise PlanFile.Stale(filepath, "hoggerstate has changed")
+                chunks += 1
+            self._checkpoint = (filepath, plan.id)
+            self._resume = (progress["chunk_size"], chunks)
+            self._load_staged(plan)
+            return
+
+        if plan.fingerprint != self.fingerprint():
+            raise PlanFile.Stale(filepath, "hoggerstate has changed")
+        for entity_code, keys in plan.allocated.items():
+            entity_type = EntityCodes[entity_code]
+            for chunk in chunked(keys, self._load_chunk_size):
+                _, rows = self._statements.select_in(
+                    table=entity_type.db_table,
+                    key_column=entity_type.db_key_column,
+                    keys=chunk,
+                )
+                if len(rows) > 0:
+                    raise PlanFile.Stale(
+                        filepath,
+                        f"{entity_type.__name__} db keys it allocated are in use",
+                    )
+
+        self._checkpoint = (filepath, plan.id)
+        self._resume = None
+        self._load_staged(plan)
+
+    def _load_staged(self, plan: PlanFile) -> None:
+        self._created = plan.created
+        self._modified = plan.modified
+        self._changes = plan.changes
+        self._unchanged = plan.unchanged
+        self._deleted = plan.deleted
+        self._rehashed = plan.rehashed
+        self._allocated = plan.allocated
+
+    @metrics.timed("write plan")
+    def write_plan(self, stream: IO[str], mode: str = "full") -> None:
+        """
+        Writes the plan computed by `stage` to `stream`; see PlanWriter for
+        the available modes.
+        """
+        PlanWriter(stream, mode=mode).write(
+            created=self._created,
+            modified=self._modified,
+            changes=self._changes,
+            unchanged=self._unchanged,
+            deleted=self._deleted,
+        )
+
+    @metrics.timed("stage")
+    def stage(self, scope: dict[int, set[str]] = None) -> None:
+        """
+        Computes the changes needed to bring the world database to the desired
+        state. A `scope` restricts staging to the given hogger_ids, by entity
+        code; entities outside of it are left as they are, e.g. when only the
+        entities of a changed hogger file need to be staged again.
+        """
         self._created = State()
         self._modified = State()
         self._changes = State()
         self._unchanged = State()
-        self._deleted = copy.deepcopy(self._actual_state)
+        self._rehashed = State()
+        self._allocated = {}
+        self._checkpoint = None
+        self._resume = None
+
+        # Each entity code's desired and tracked hogger_ids are classified
+        # with set operations: ids only in the desired state are created, ids
+        # only in hoggerstate are deleted, and the intersection are candidates
+        # for modification.
+        to_load: dict[int, list[str]] = {}
+        candidates: dict[int, list[str]] = {}
         for entity_code in EntityCodes:
-            for hogger_id, des_entity in self._desired_state[entity_code].items():
-                # If hogger_id from desired state exists in actual state,
-                # compute the diff; otherwise, add to `created`.
-                if hogger_id in self._actual_state[entity_code]:
-                    # If the diff returned has contents in it, add to
-                    # `modified`. Otherwise, no action necessary.
-                    modified_entity, mod_changes = des_entity.diff(
-                        self._actual_state[entity_code][hogger_id],
-                    )
-                    if len(mod_changes) > 0:
-                        # If any changes are returned from the calling
-                        # Entity.diff, add add the item to the `modified` dict,
-                        # and store the changes in the dict that will be
-                        # returned.
-                        self._modified[entity_code][hogger_id] = modified_entity
-                        self._changes[entity_code][hogger_id] = mod_changes
-                    else:
-                        # We don't need to store the unchanged entity, since we
-                        # aren't going to do anything with it.
-                        self._unchanged[entity_code][hogger_id] = None
-                    del self._deleted[entity_code][hogger_id]
+            desired = self._desired_state[entity_code]
+            hoggerstate = self._hoggerstate[entity_code]
+            desired_ids, tracked_ids = desired.keys(), hoggerstate.keys()
+            if scope is not None:
+                in_scope = scope.get(entity_code, set())
+                desired_ids = desired_ids & in_scope
+                tracked_ids = tracked_ids & in_scope
+            created = desired_ids - tracked_ids
+            removed = tracked_ids - desired_ids
+            # The intersection, in desired order so that plans are stable.
+            tracked = [
+                hogger_id
+                for hogger_id in desired
+                if hogger_id in tracked_ids and hogger_id in desired_ids
+            ]
+
+            if len(created) > 0:
+                # Kept in desired order, so allocated keys follow the manifests.
+                self._created[entity_code] = {
+                    hogger_id: entity
+                    for hogger_id, entity in desired.items()
+                    if hogger_id in created
+                }
+
+            # Candidates whose content_hash matches the one recorded in
+            # hoggerstate were applied with exactly this content, so they're
+            # unchanged and don't need to be read back from the world database.
+            # The rest, and every removed entity, are loaded in bulk.
+            changed = []
+            for hogger_id in tracked:
+                des_entity = desired[hogger_id]
+                db_key, content_hash = hoggerstate[hogger_id]
+                if des_entity.content_hash() == content_hash and (
+                    des_entity.get_db_key() < 0 or des_entity.get_db_key() == db_key
+                ):
+                    des_entity.set_db_key(db_key)
+                    self._unchanged[entity_code][hogger_id] = None
                 else:
-                    des_entity.set_db_key(60000)
+                    changed.append(hogger_id)
+            candidates[entity_code] = changed
+            to_load[entity_code] = changed + list(removed)
+        self._actual_state = self._get_actual_state(to_load)
+
+        # Entities in the world that are no longer desired are the difference
+        # of the two key sets. Only their db_keys are needed to delete them,
+        # so they're never built from their rows.
+        self._deleted = State()
+        for entity_code in EntityCodes:
+            actual_state = self._actual_state[entity_code]
+            for hogger_id in (
+                actual_state.keys() - self._desired_state[entity_code].keys()
+            ):
+                self._deleted[entity_code][hogger_id] = actual_state.stored(hogger_id)
+
+        # Only candidates are diffed. One whose row is missing from the world
+        # database is created again, and one whose row holds exactly its
+        # desired values is unchanged without building the actual entity.
+        for entity_code, hogger_ids in candidates.items():
+            desired = self._desired_state[entity_code]
+            actual_state = self._actual_state[entity_code]
+            pairs = []
+            for hogger_id in hogger_ids:
+                des_entity = desired[hogger_id]
+                if hogger_id not in actual_state:
                     self._created[entity_code][hogger_id] = des_entity
-        return self._stage_str()
+                elif actual_state.matches(hogger_id, des_entity.to_sql_dict()):
+                    self._adopt_unchanged(
+                        entity_code,
+                        hogger_id,
+                        actual_state.db_key(hogger_id),
+                        des_entity.content_hash(),
+                    )
+                else:
+                    pairs.append((hogger_id, des_entity, actual_state[hogger_id]))
+            for hogger_id, modified_entity, mod_changes, content_hash in self._diff(
+                pairs,
+            ):
+                if len(mod_changes) > 0:
+                    self._modified[entity_code][hogger_id] = modified_entity
+                    self._changes[entity_code][hogger_id] = mod_changes
+                    continue
+                self._adopt_unchanged(
+                    entity_code,
+                    hogger_id,
+                    actual_state.db_key(hogger_id),
+                    content_hash,
+                )
+
+        # Created entities without a pinned db_key are given unused ones, all
+        # at once per entity code so that they're contiguous where possible.
+        for entity_code, created in self._created.items():
+            unkeyed = [e for e in created.values() if e.get_db_key() < 0]
+            if len(unkeyed) == 0:
+                continue
+            self._id_allocator.reserve(
+                entity_code,
+                [e.get_db_key() for e in created.values() if e.get_db_key() >= 0],
+            )
+            keys = self._id_allocator.allocate(entity_code, len(unkeyed))
+            self._allocated[entity_code] = keys
+            for entity, db_key in zip(unkeyed, keys):
+                entity.set_db_key(db_key)
 
-    def apply(
+    def _adopt_unchanged(
         self,
+        entity_code: int,
+        hogger_id: str,
+        db_key: int,
+        content_hash: str,
     ) -> None:
-        with self._cnx.cursor() as cursor:
-            for entity_code in EntityCodes:
-                for _, entity in self._created[entity_code].items():
-                    entity.apply(cursor)
+        # We don't need to store the unchanged entity, since we aren't going to
+        # do anything with it. If its recorded content_hash is stale, the
+        # hoggerstate row is refreshed on apply so the next run can skip it.
+        des_entity = self._desired_state[entity_code][hogger_id]
+        if des_entity.get_db_key() < 0:
+            des_entity.set_db_key(db_key)
+        self._unchanged[entity_code][hogger_id] = None
+        if content_hash != self._hoggerstate[entity_code][hogger_id][1]:
+            self._rehashed[entity_code][hogger_id] = des_entity
+
+    @metrics.timed("diff")
+    def _diff(
+        self,
+        pairs: list[tuple[str, Entity, Entity]],
+    ) -> list[tuple[str, Entity, dict[str, any], str]]:
+        """
+        Diffs `(hogger_id, desired, actual)` pairs; see `_diff_pairs`. Large
+        batches are spread over a process pool when `diff_jobs` allows it.
+        """
+        if self._diff_jobs == 1 or len(pairs) < PARALLEL_DIFF_MIN:
+            return _diff_pairs(pairs)
+
+        jobs = self._diff_jobs if self._diff_jobs > 0 else os.cpu_count()
+        chunk_size = -(-len(pairs) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = []
+            for result in executor.map(_diff_pairs, chunked(pairs, chunk_size)):
+                results.extend(result)
+        return results
+
+    @metrics.timed("apply")
+    def apply(self, chunk_size: int = 0) -> None:
+        """
+        Writes the staged changes to the world database.
+
+        With a `chunk_size` of 0, everything is written in one transaction.
+        Otherwise, every `chunk_size` entities are committed in their own
+        transaction, together with their hoggerstate rows. If the plan was
+        loaded with `load_plan`, progress is checkpointed next to the plan
+        file after every chunk, and a later run loading the same plan resumes
+        after the last committed chunk.
+        """
+        skip = 0
+        if self._resume is not None:
+            chunk_size, skip = self._resume
+
+        pending = self._pending_writes()
+        if chunk_size <= 0:
+            chunks = [pending]
+        else:
+            chunks = chunked(pending, chunk_size)
+
+        # Several hogger_ids may share a db_key, so a deleted entity's row is
+        # only deleted if no entity that's kept or written still uses its key.
+        kept_keys: dict[int, set[int]] = {}
+        for entity_code in EntityCodes:
+            kept_keys[entity_code] = {
+                db_key
+                for hogger_id, (db_key, _) in self._hoggerstate[entity_code].items()
+                if hogger_id not in self._deleted[entity_code]
+            }
+        for entity_code, _, entity, action in pending:
+            if action != "delete":
+                kept_keys[entity_code].add(entity.get_db_key())
+
+        for i, chunk in enumerate(chunks):
+            if i < skip:
+                continue
+            rows = [
+                (
+                    entity_code,
+                    hogger_id,
+                    None
+                    if action == "delete"
+                    else (entity.get_db_key(), entity.content_hash()),
+                )
+                for entity_code, hogger_id, entity, action in chunk
+            ]
+            checkpoint = self._checkpoint is not None and chunk_size > 0
+            try:
+                self._write_chunk(chunk, kept_keys)
+                if checkpoint:
+                    # The fingerprint hoggerstate will have once the chunk is
+                    # committed is recorded beforehand, so that a run
+                    # interrupted between the commit and the next checkpoint
+                    # still resumes.
+                    self._write_progress(
+                        chunk_size,
+                        chunks=i,
+                        next_fingerprint=self._fingerprint_after(rows),
+                    )
+                self._cnx.commit()
+            except BaseException:
+                # Nothing a failed chunk wrote is left in the transaction, to
+                # be committed by a later apply on the same connection.
+                self.rollback()
+                raise
+
+            for entity_code, hogger_id, row in rows:
+                self._record_hoggerstate(entity_code, hogger_id, row)
+            if checkpoint:
+                self._write_progress(chunk_size, chunks=i + 1)
+
+        if self._checkpoint is not None:
+            PlanFile.remove_progress(self._checkpoint[0])
+        self._resume = None
+
+    def _write_chunk(
+        self,
+        chunk: list[tuple[int, str, Entity, str]],
+        kept_keys: dict[int, set[int]],
+    ) -> None:
+        """
+        Issues the statements writing `chunk`, without committing them.
+        """
+        # Deletions are issued first, so that an entity pinned to the key of a
+        # deleted one isn't removed with it.
+        deleted: dict[int, tuple[set[int], list[str]]] = {}
+        for entity_code, hogger_id, entity, action in chunk:
+            if action == "delete":
+                keys, hogger_ids = deleted.setdefault(entity_code, (set(), []))
+                if entity.get_db_key() not in kept_keys[entity_code]:
+                    keys.add(entity.get_db_key())
+                hogger_ids.append(hogger_id)
+        for entity_code, (keys, hogger_ids) in deleted.items():
+            # Sorted keys let each statement walk the primary key in order.
+            EntityCodes[entity_code].delete_keys(
+                self._statements,
+                sorted(keys),
+                sorted(hogger_ids),
+                max_keys=self._write_batch_rows,
+            )
+
+        with BatchWriter(
+            self._statements,
+            max_rows=self._write_batch_rows,
+            max_bytes=self._write_batch_bytes,
+        ) as writer:
+            for entity_code, hogger_id, entity, action in chunk:
+                if action == "delete":
+                    continue
+                if action == "write":
+                    writer.add(entity.db_table, entity.to_sql_dict())
+                writer.add(
+                    "hoggerstate",
+                    {
+                        "entity_code": entity_code,
+                        "hogger_identifier": hogger_id,
+                        "db_key": entity.get_db_key(),
+                        "content_hash": entity.content_hash(),
+                    },
+                )
+
+    def _pending_writes(self) -> list[tuple[int, str, Entity, str]]:
+        """
+        Everything `apply` writes, in order, as tuples of
+        `(entity_code, hogger_id, entity, action)`. The action is "delete" for
+        deleted entities, "write" for created and modified ones, and "rehash"
+        for entities that only need their hoggerstate row refreshed.
+        """
+        pending = []
+        for entity_code in EntityCodes:
+            for hogger_id, entity in self._deleted[entity_code].items():
+                pending.append((entity_code, hogger_id, entity, "delete"))
+        for entity_code in EntityCodes:
+            for hogger_id, entity in chain(
+                self._created[entity_code].items(),
+                self._modified[entity_code].items(),
+            ):
+                pending.append((entity_code, hogger_id, entity, "write"))
+            for hogger_id, entity in self._rehashed[entity_code].items():
+                pending.append((entity_code, hogger_id, entity, "rehash"))
+        return pending
+
+    def _write_progress(
+        self,
+        chunk_size: int,
+        chunks: int,
+        next_fingerprint: str = None,
+    ) -> None:
+        filepath, plan_id = self._checkpoint
+        PlanFile.write_progress(
+            filepath,
+            plan_id=plan_id,
+            chunk_size=chunk_size,
+            chunks=chunks,
+            fingerprint=self.fingerprint(),
+            next_fingerprint=next_fingerprint,
+        )
+
+    def _fingerprint_after(self, rows: list[tuple[int, str, tuple[int, str]]]) -> str:
+        """
+        The fingerprint hoggerstate will have once `rows`, as
+        `(entity_code, hogger_id, row)` passed to `_record_hoggerstate`, are
+        recorded, without recording them.
+        """
+        self.fingerprint()
+        digest = self._hoggerstate_digest
+        for entity_code, hogger_id, row in rows:
+            previous = self._hoggerstate[entity_code].get(hogger_id)
+            if previous is not None:
+                digest -= _row_digest(entity_code, hogger_id, *previous)
+            if row is not None:
+                digest += _row_digest(entity_code, hogger_id, *row)
+        return f"{digest % 2**256:064x}"
+
+    def _record_hoggerstate(
+        self,
+        entity_code: int,
+        hogger_id: str,
+        row: tuple[int, str],
+    ) -> None:
+        """
+        Keeps the in-memory hoggerstate, and its fingerprint, in step with the
+        hoggerstate table, after `row` (db_key, content_hash) is written for
+        `hogger_id`, or the row is deleted if `row` is None.
+        """
+        self.fingerprint()
+        previous = self._hoggerstate[entity_code].pop(hogger_id, None)
+        if previous is not None:
+            self._hoggerstate_digest -= _row_digest(entity_code, hogger_id, *previous)
+        if row is not None:
+            self._hoggerstate[entity_code][hogger_id] = row
+            self._hoggerstate_digest += _row_digest(entity_code, hogger_id, *row)
+
+
+def _diff_pairs(
+    pairs: list[tuple[str, Entity, Entity]],
+) -> list[tuple[str, Entity, dict[str, any], str]]:
+    """
+    Diffs each `(hogger_id, desired, actual)` pair, returning
+    `(hogger_id, modified_entity, changes, content_hash)`. Unchanged entities
+    have no modified entity and no changes, but the content_hash of the
+    actual entity; modified entities have no content_hash.
+    """
+    results = []
+    for hogger_id, des_entity, act_entity in pairs:
+        modified_entity, changes = des_entity.diff(act_entity)
+        if len(changes) > 0:
+            results.append((hogger_id, modified_entity, changes, None))
+        else:
+            results.append((hogger_id, None, {}, modified_entity.content_hash()))
+    return results
 
-                for _, entity in self._modified[entity_code].items():
-                    entity.apply(cursor)
 
-                for _, entity in self._deleted[entity_code].items():
-                    entity.apply(cursor)
-        self._cnx.commit()
+def _row_digest(
+    entity_code: int,
+    hogger_id: str,
+    db_key: int,
+    content_hash: str,
+) -> int:
+    row = f"{entity_code}\0{hogger_id}\0{db_key}\0{content_hash}"
+    return int.from_bytes(hashlib.sha256(row.encode()).digest(), "big")
@@ -0,0 +1,111 @@
+from typing import IO, Iterator
+
+import yaml
+from yaml.events import (
+    AliasEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+)
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+
+# Prefer the libyaml bindings when PyYAML was built with them.
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+
+def iter_sequence(stream: IO, key: str) -> Iterator[any]:
+    """
+    Yields the elements of the top-level `key` sequence of every document in
+    `stream`, one at a time.
+
+    Only the element currently being yielded is ever composed into a YAML
+    node tree, so memory stays flat no matter how long the sequence is. Other
+    top-level keys are composed and discarded.
+    """
+    loader = SafeLoader(stream)
+    try:
+        loader.get_event()  # StreamStartEvent
+        while not loader.check_event(StreamEndEvent):
+            loader.get_event()  # DocumentStartEvent
+            anchors: dict[str, Node] = {}
+            if loader.check_event(MappingStartEvent):
+                loader.get_event()
+                while not loader.check_event(MappingEndEvent):
+                    k = loader.construct_document(_compose(loader, anchors))
+                    if k == key and loader.check_event(SequenceStartEvent):
+                        loader.get_event()
+                        while not loader.check_event(SequenceEndEvent):
+                            node = _compose(loader, anchors)
+                            yield loader.construct_document(node)
+                        loader.get_event()
+                    else:
+                        _compose(loader, anchors)
+                loader.get_event()
+            else:
+                _compose(loader, anchors)
+            loader.get_event()  # DocumentEndEvent
+    finally:
+        loader.dispose()
+
+
+def _compose(loader: SafeLoader, anchors: dict[str, Node]) -> Node:
+    # A minimal version of yaml.composer.Composer.compose_node, which the
+    # libyaml-backed loaders don't expose.
+    event = loader.get_event()
+    if isinstance(event, AliasEvent):
+        return anchors[event.anchor]
+
+    if isinstance(event, ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(ScalarNode, event.value, event.implicit)
+        node = ScalarNode(
+            tag,
+            event.value,
+            event.start_mark,
+            event.end_mark,
+            style=event.style,
+        )
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        return node
+
+    if isinstance(event, SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(SequenceNode, None, event.implicit)
+        node = SequenceNode(tag, [], event.start_mark, None)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        while not loader.check_event(SequenceEndEvent):
+            node.value.append(_compose(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+        return node
+
+    if isinstance(event, MappingStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(MappingNode, None, event.implicit)
+        node = MappingNode(tag, [], event.start_mark, None)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        while not loader.check_event(MappingEndEvent):
+            item_key = _compose(loader, anchors)
+            item_value = _compose(loader, anchors)
+            node.value.append((item_key, item_value))
+        node.end_mark = loader.get_event().end_mark
+        return node
+
+    raise yaml.composer.ComposerError(
+        None,
+        None,
+        f"expected a node, but found {event.__class__.__name__}",
+        event.start_mark,
+    )
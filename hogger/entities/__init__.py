@@ -1,8 +1,14 @@
+from .codec import CodecPlan, codec_plan
+from .diff import DiffPlan, diff_plan
 from .entity import Entity
 from .entity_codes import EntityCodes
 from .item import *
 
 __all__ = [
+    "CodecPlan",
+    "codec_plan",
+    "DiffPlan",
+    "diff_plan",
     "Entity",
     "EntityCodes",
 ]
@@ -0,0 +1,70 @@
+from functools import cache
+
+from pydantic import BaseModel
+
+
+class CodecPlan:
+    """
+    The `from_sql` and `to_sql` hooks an entity declares in its fields'
+    `json_schema_extra`, collected once per class into flat tuples of
+    `(model_field, hook, field_type)`.
+
+    Converting a row then only runs the hooks, rather than walking
+    `model_fields` and inspecting every field's schema extras again.
+    """
+
+    __slots__ = ("from_sql", "to_sql")
+
+    def __init__(self, model: type[BaseModel]) -> None:
+        from_sql, to_sql = [], []
+        for field, field_properties in model.model_fields.items():
+            json_schema_extra = field_properties.json_schema_extra
+            if json_schema_extra is None:
+                continue
+            if "from_sql" in json_schema_extra:
+                from_sql.append(
+                    (field, json_schema_extra["from_sql"], field_properties.annotation),
+                )
+            if "to_sql" in json_schema_extra:
+                to_sql.append(
+                    (field, json_schema_extra["to_sql"], field_properties.annotation),
+                )
+        self.from_sql: tuple[tuple[str, callable, type], ...] = tuple(from_sql)
+        self.to_sql: tuple[tuple[str, callable, type], ...] = tuple(to_sql)
+
+    def model_args(self, sql_dict: dict[str, any], cursor=None) -> dict[str, any]:
+        """
+        Converts a row, keyed by column, into keyword arguments for the model.
+        """
+        return {
+            field: from_sql_func(
+                sql_dict=sql_dict,
+                cursor=cursor,
+                field_type=field_type,
+            )
+            for field, from_sql_func, field_type in self.from_sql
+        }
+
+    def sql_dict(self, model_dict: dict[str, any], cursor=None) -> dict[str, any]:
+        """
+        Converts the fields of a model into a row, keyed by column.
+        """
+        row = {}
+        for field, to_sql_func, field_type in self.to_sql:
+            row.update(
+                to_sql_func(
+                    model_field=field,
+                    model_dict=model_dict,
+                    cursor=cursor,
+                    field_type=field_type,
+                ),
+            )
+        return row
+
+
+@cache
+def codec_plan(model: type[BaseModel]) -> CodecPlan:
+    """
+    Returns the CodecPlan of `model`, compiling it on first use.
+    """
+    return CodecPlan(model)
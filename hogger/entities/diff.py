@@ -0,0 +1,152 @@
+from enum import Enum
+from functools import cache
+from operator import itemgetter
+from typing import Literal, get_args, get_origin
+
+from pydantic import BaseModel
+
+
+class DiffPlan:
+    """
+    A comparator per field of a model, compiled once per class from the field
+    annotations. Each comparator reduces a value to a canonical, hashable form:
+
+        - enums become their integer value,
+        - flag lists (`list[ItemFlag | int]`) become a frozenset, so order and
+          duplicates don't matter,
+        - enum maps (`dict[(ItemStat | int), int]`) become a frozenset of items,
+        - nested models become a tuple of their own canonical fields,
+        - other lists keep their order, as a tuple.
+
+    Two entities are compared through the tuple of their canonical fields. The
+    tuples are hashed first, so entities that didn't change cost one hash
+    compare, and fields are only walked when the hashes differ.
+    """
+
+    __slots__ = ("fields", "_plain", "_converted")
+
+    def __init__(self, model: type[BaseModel]) -> None:
+        plain, converted = [], []
+        for field, field_properties in model.model_fields.items():
+            canon = _comparator(field_properties.annotation)
+            if canon is None:
+                plain.append(field)
+            else:
+                converted.append((field, canon))
+        # Fields whose values are already canonical are fetched in one call;
+        # `fields` follows the same order as the canonical tuple.
+        self.fields: tuple[str, ...] = (*plain, *(f for f, _ in converted))
+        self._plain = _tuple_getter(plain)
+        self._converted: tuple[tuple[str, callable], ...] = tuple(converted)
+
+    def canonical(self, model: BaseModel) -> tuple:
+        """
+        Returns the canonical form of `model`, one element per field of
+        `fields`.
+        """
+        values = vars(model)
+        return (
+            *self._plain(values),
+            *(canon(values[field]) for field, canon in self._converted),
+        )
+
+    def diff(self, desired: BaseModel, actual: BaseModel) -> list[str]:
+        """
+        Returns the names of the fields which differ between `desired` and
+        `actual`.
+        """
+        desired_key = self.canonical(desired)
+        actual_key = self.canonical(actual)
+        if hash(desired_key) == hash(actual_key) and desired_key == actual_key:
+            return []
+        return [
+            field for field, d, a in zip(self.fields, desired_key, actual_key) if d != a
+        ]
+
+
+@cache
+def diff_plan(model: type[BaseModel]) -> DiffPlan:
+    """
+    Returns the DiffPlan of `model`, compiling it on first use.
+    """
+    return DiffPlan(model)
+
+
+def _tuple_getter(fields: list[str]) -> callable:
+    # itemgetter only returns a tuple when given two or more keys.
+    if len(fields) == 0:
+        return lambda values: ()
+    if len(fields) == 1:
+        (field,) = fields
+        return lambda values: (values[field],)
+    return itemgetter(*fields)
+
+
+def _comparator(annotation: type) -> callable:
+    """
+    Returns the function reducing a value of `annotation` to its canonical
+    form, or None when values are already canonical.
+    """
+    origin = get_origin(annotation)
+    if origin is list:
+        (item_type,) = get_args(annotation)
+        canon = _comparator(item_type) or _value
+        if _is_enum(item_type):
+            return lambda v: frozenset(map(canon, v))
+        return lambda v: tuple(map(canon, v))
+    if origin is dict:
+        key_canon, value_canon = (
+            _comparator(t) or _value for t in get_args(annotation)
+        )
+        return lambda v: frozenset((key_canon(k), value_canon(x)) for k, x in v.items())
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _model_comparator(annotation)
+    if _is_enum(annotation) and not _is_int(annotation):
+        return _enum_value
+    if _is_scalar(annotation):
+        return None
+    return _value
+
+
+def _model_comparator(model: type[BaseModel]) -> callable:
+    def canon(v: BaseModel) -> tuple:
+        # Plans of nested models are resolved on use, so that self-referencing
+        # models don't recurse while compiling.
+        return diff_plan(type(v)).canonical(v) if v is not None else None
+
+    return canon
+
+
+def _is_enum(annotation: type) -> bool:
+    if isinstance(annotation, type):
+        return issubclass(annotation, Enum)
+    return any(_is_enum(t) for t in get_args(annotation))
+
+
+def _is_int(annotation: type) -> bool:
+    # IntEnum and IntFlag members compare and hash like their values.
+    if isinstance(annotation, type):
+        return issubclass(annotation, int)
+    return all(_is_int(t) for t in get_args(annotation))
+
+
+def _is_scalar(annotation: type) -> bool:
+    if get_origin(annotation) is Literal:
+        return True
+    if isinstance(annotation, type):
+        return issubclass(annotation, (int, float, str, bytes, type(None)))
+    args = get_args(annotation)
+    return len(args) > 0 and all(_is_scalar(t) for t in args)
+
+
+def _enum_value(v: any) -> any:
+    return v.value if isinstance(v, Enum) else v
+
+
+def _value(v: any) -> any:
+    # Values of loosely annotated fields may be unhashable.
+    if isinstance(v, (list, dict, set)):
+        return repr(v)
+    if isinstance(v, BaseModel):
+        return diff_plan(type(v)).canonical(v)
+    return v
@@ -1,5 +1,7 @@
+import hashlib
 from abc import ABCMeta, abstractmethod, abstractstaticmethod
 from inspect import cleandoc
+from typing import ClassVar
 
 from mysql.connector.cursor_cext import CMySQLCursor as Cursor
 from pydantic import BaseModel, Field
@@ -18,14 +20,34 @@ class Entity(
     )
     # depends_on: list["Entity"] = []
 
+    # The world database table backing this entity type, and the column in
+    # that table which holds the value returned by `get_db_key`.
+    db_table: ClassVar[str]
+    db_key_column: ClassVar[str]
+    # The code identifying this entity type in hoggerstate; see EntityCodes.
+    entity_code: ClassVar[int]
+
     @abstractstaticmethod
     def from_hoggerstate(
         db_key: int,
         hogger_id: str,
-        cursor: Cursor,
+        statements: "Statements",
     ) -> "Entity":
         pass
 
+    @classmethod
+    @abstractmethod
+    def from_sql_rows(
+        cls,
+        column_names: tuple[str, ...],
+        rows: list[tuple],
+        cursor: Cursor = None,
+    ) -> list["Entity"]:
+        """
+        Builds one entity per row of a result set read from `db_table`.
+        """
+        pass
+
     @abstractmethod
     def get_db_key(self) -> int:
         pass
@@ -43,5 +65,49 @@ class Entity(
         pass
 
     @abstractmethod
-    def apply(self, cursor: Cursor) -> None:
+    def to_sql_dict(self, cursor: Cursor = None) -> dict[str, any]:
+        """
+        Returns the row of `db_table` describing this entity, keyed by column.
+        """
         pass
+
+    def content_hash(self) -> str:
+        """
+        Digest of the row this entity writes to `db_table`, excluding its
+        db_key. Stored in hoggerstate when the entity is applied, so that later
+        runs can tell the entity is unchanged without reading it back.
+        """
+        row = self.to_sql_dict()
+        del row[self.db_key_column]
+        return hashlib.sha256(repr(sorted(row.items())).encode()).hexdigest()
+
+    @abstractmethod
+    def apply(self, statements: "Statements") -> None:
+        pass
+
+    @classmethod
+    def delete_keys(
+        cls,
+        statements: "Statements",
+        keys: list[int],
+        hogger_ids: list[str],
+        max_keys: int = 1000,
+    ) -> int:
+        """
+        Deletes the rows with the given db_keys from `db_table`, and the
+        hoggerstate rows of the given hogger_ids, using chunked
+        `DELETE ... IN (...)` statements. Returns the number of statements
+        executed.
+        """
+        return statements.delete_in(
+            table=cls.db_table,
+            key_column=cls.db_key_column,
+            keys=keys,
+            max_keys=max_keys,
+        ) + statements.delete_in(
+            table="hoggerstate",
+            key_column="hogger_identifier",
+            keys=hogger_ids,
+            where={"entity_code": cls.entity_code},
+            max_keys=max_keys,
+        )
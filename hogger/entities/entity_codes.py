@@ -1,7 +1,5 @@
 from collections import OrderedDict
 
-import networkx as nx
-
 from .entity import Entity
 from .item.item import Item
 
@@ -28,6 +26,8 @@ EntityCodes = EntityCodesDict(
     },
 )
 
+# import networkx as nx
+#
 # G = nx.DiGraph()
 # for cls in EntityCodes:
 #     if hasattr(cls, 'depends_on'):
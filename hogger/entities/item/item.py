@@ -1,6 +1,6 @@
 from enum import Enum, IntFlag
 from textwrap import dedent
-from typing import Literal, Optional
+from typing import ClassVar, Literal, Optional
 
 from mysql.connector.cursor_cext import CMySQLCursor as Cursor
 from pydantic import (
@@ -12,6 +12,8 @@ from pydantic import (
 )
 
 from hogger.entities import Entity
+from hogger.entities.codec import codec_plan
+from hogger.entities.diff import diff_plan
 from hogger.entities.item import *
 from hogger.types import *
 from hogger.types import EnumUtils, LookupID, Money
@@ -45,6 +47,10 @@ _enum_map_fields = [
 
 
 class Item(Entity, extra="allow"):
+    db_table: ClassVar[str] = "item_template"
+    db_key_column: ClassVar[str] = "entry"
+    entity_code: ClassVar[int] = 1
+
     type: Literal["Item"] = "Item"
 
     id: int = Field(
@@ -892,35 +898,35 @@ class Item(Entity, extra="allow"):
     def from_hoggerstate(
         db_key: int,
         hogger_identifier: str,
-        cursor: Cursor,
+        statements: "Statements",
     ) -> "Item":
-        cursor.execute(
-            f"""
-            SELECT * FROM item_template
-            WHERE entry={db_key};
-            """,
+        column_names, rows = statements.select_in(
+            table=Item.db_table,
+            key_column=Item.db_key_column,
+            keys=[db_key],
         )
-        entity = cursor.fetchall()
-        assert len(entity) == 1
-
-        item_args = {}
-        sql_dict = dict(zip(cursor.column_names, entity[0]))
-        for field, field_properties in Item.model_fields.items():
-            json_schema_extra = field_properties.json_schema_extra
-            if json_schema_extra is not None and "from_sql" in json_schema_extra:
-                from_sql_func = json_schema_extra["from_sql"]
-                item_args[field] = from_sql_func(
-                    sql_dict=sql_dict,
-                    cursor=cursor,
-                    field_type=field_properties.annotation,
-                )
+        assert len(rows) == 1
+        return Item.from_sql_rows(column_names, rows)[0]
 
-        item_args["type"] = "Item"
-        tmp = sql_dict["name"].split("#")
-        if len(tmp) == 1:
-            tmp.append("")
-        item_args["tag"] = tmp[1]
-        return Item(**item_args)
+    @classmethod
+    def from_sql_rows(
+        cls,
+        column_names: tuple[str, ...],
+        rows: list[tuple],
+        cursor: Cursor = None,
+    ) -> list["Item"]:
+        plan = codec_plan(Item)
+        items = []
+        for row in rows:
+            sql_dict = dict(zip(column_names, row))
+            item_args = plan.model_args(sql_dict, cursor)
+            item_args["type"] = "Item"
+            tmp = sql_dict["name"].split("#")
+            if len(tmp) == 1:
+                tmp.append("")
+            item_args["tag"] = tmp[1]
+            items.append(Item(**item_args))
+        return items
 
     def diff(
         self,
@@ -936,39 +942,34 @@ class Item(Entity, extra="allow"):
         desired = vars(self)
         actual = vars(other)
 
-        for field in Item.model_fields:
-            if desired[field] != actual[field]:
-                diffs[field] = {
-                    "desired": desired[field],
-                    "actual": actual[field],
-                }
-                other.__setattr__(field, desired[field])
+        for field in diff_plan(Item).diff(self, other):
+            diffs[field] = {
+                "desired": desired[field],
+                "actual": actual[field],
+            }
+            other.__setattr__(field, desired[field])
         return other, diffs
 
-    def apply(self, cursor: Cursor) -> None:
-        args = {}
-        model_dict = vars(self)
-
-        for field, field_properties in Item.model_fields.items():
-            json_schema_extra = field_properties.json_schema_extra
-            if json_schema_extra is not None and "to_sql" in json_schema_extra:
-                to_sql_func = json_schema_extra["to_sql"]
-                args = args | to_sql_func(
-                    model_field=field,
-                    model_dict=model_dict,
-                    cursor=cursor,
-                    field_type=field_properties.annotation,
-                )
+    def to_sql_dict(self, cursor: Cursor = None) -> dict[str, any]:
+        return codec_plan(Item).sql_dict(vars(self), cursor)
 
-        db_key = args["entry"]
-        keys = ("(`") + ("`, `".join(args.keys())) + ("`)")
-        values = str(tuple(args.values()))
-        cursor.execute(
-            f"REPLACE INTO item_template{keys} " 
-            f"VALUES {values}; "
+    def apply(self, statements: "Statements") -> None:
+        args = self.to_sql_dict()
+        statements.upsert(
+            table=self.db_table,
+            columns=tuple(args.keys()),
+            rows=[tuple(args.values())],
         )
-        cursor.execute(
-            f"REPLACE INTO hoggerstate(entity_code, hogger_identifier, db_key) "
-            f"VALUES (1, '{self.hogger_identifier()}', {db_key});",
+        statements.upsert(
+            table="hoggerstate",
+            columns=("entity_code", "hogger_identifier", "db_key", "content_hash"),
+            rows=[
+                (
+                    self.entity_code,
+                    self.hogger_identifier(),
+                    args[self.db_key_column],
+                    self.content_hash(),
+                ),
+            ],
         )
         return None
@@ -1,9 +1,9 @@
 from enum import Enum
-from typing import get_args
 
 from mysql.connector.cursor_cext import CMySQLCursor as Cursor
 
 from hogger.entities.item import ItemStat
+from hogger.types import EnumMapUtils
 
 
 def stats_from_sql_kvpairs(
@@ -25,9 +25,9 @@ def stats_from_sql_kvpairs(
         cursor: Cursor,
         field_type: type,
     ) -> dict[dict[(Enum | int), int]]:
+        EnumType = EnumMapUtils.key_type(field_type)
         result = {}
         for k, v in kvpairs.items():
-            EnumType = get_args(get_args(field_type)[0])[0]
             try:
                 enum_key = EnumType(sql_dict[k])
             except:
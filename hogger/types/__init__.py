@@ -1,5 +1,5 @@
 from .duration import Duration
-from .enum import EnumUtils
+from .enum import EnumDomain, EnumUtils
 from .enummap import EnumMapUtils
 from .intflag import IntFlagUtils
 from .lookup import Lookup, LookupID
@@ -9,6 +9,7 @@ __all__ = [
     # duration
     "Duration",
     # enum
+    "EnumDomain",
     "EnumUtils",
     # enummap
     "EnumMapUtils",
@@ -1,43 +1,69 @@
-from difflib import SequenceMatcher
 from enum import Enum
-from typing import get_args, get_type_hints
+from functools import cache
+from typing import get_args
 
 from mysql.connector.cursor_cext import CMySQLCursor as Cursor
 from pydantic import FieldSerializationInfo, FieldValidationInfo
 
-from hogger.util import InvalidValueException
+from hogger.util import InvalidValueException, SuggestionIndex
+
+
+class EnumDomain:
+    """
+    The members of an Enum, indexed by name and by value.
+    """
+
+    __slots__ = ("EnumType", "by_name", "by_value", "_suggestions")
+
+    def __init__(self, EnumType: type[Enum]) -> None:
+        self.EnumType = EnumType
+        self.by_name: dict[str, Enum] = {i.name: i for i in EnumType}
+        self.by_value: dict[int, Enum] = {i.value: i for i in EnumType}
+        self._suggestions: SuggestionIndex = None
+
+    def suggest(self, name: str) -> str | None:
+        """
+        Returns the member name closest to `name`, if any is close enough.
+        """
+        if self._suggestions is None:
+            self._suggestions = SuggestionIndex(list(self.by_name.keys()))
+        return self._suggestions.suggest(name)
 
 
 class EnumUtils:
+    @staticmethod
+    @cache
+    def domain(EnumType: type[Enum]) -> EnumDomain:
+        return EnumDomain(EnumType)
+
+    @staticmethod
+    @cache
+    def field_domain(cls: type, field_name: str) -> EnumDomain:
+        """
+        Returns the EnumDomain of the Enum used by `field_name` on the model
+        `cls`, resolving the field's annotation only once per model and field.
+        """
+        return EnumUtils.domain(
+            EnumUtils.enum_type(cls.model_fields[field_name].annotation),
+        )
+
     @staticmethod
     def parse(cls, v: (str | int), info: FieldValidationInfo) -> Enum | int:
-        EnumType = list(
-            filter(
-                lambda field_type: (issubclass(field_type, Enum)),
-                get_args(get_type_hints(cls)[info.field_name]),
-            ),
-        )[0]
-        domain = {i.name: i.value for i in EnumType}
+        domain = EnumUtils.field_domain(cls, info.field_name)
         suggestion = None
         if issubclass(type(v), Enum):
             return v
         elif isinstance(v, int):
-            if v in domain.values():
-                return EnumType(v)
-            return v
+            return domain.by_value.get(v, v)
         elif isinstance(v, str):
-            if v in domain:
-                return EnumType[v]
-            else:
-                # Attempt to find the nearest valid Enum value
-                for k in domain.keys():
-                    if SequenceMatcher(None, v, k).ratio() >= 0.7:
-                        suggestion = k
-                        break
+            if v in domain.by_name:
+                return domain.by_name[v]
+            # Attempt to find the nearest valid Enum value
+            suggestion = domain.suggest(v)
 
         raise InvalidValueException(
             field_name=info.field_name,
-            expected_values=list(domain.keys()),
+            expected_values=list(domain.by_name.keys()),
             FieldType=Enum,
             actual=v,
             suggestion=suggestion,
@@ -59,6 +85,21 @@ class EnumUtils:
         except:
             return value
 
+    @staticmethod
+    @cache
+    def enum_type(field_type: type) -> type[Enum]:
+        """
+        Returns the Enum within an annotation such as `(Quality | int)`,
+        `list[ItemFlag | int]` or `dict[(ItemStat | int), int]`.
+        """
+        for t in get_args(field_type):
+            if isinstance(t, type) and issubclass(t, Enum):
+                return t
+            EnumType = EnumUtils.enum_type(t)
+            if EnumType is not None:
+                return EnumType
+        return None
+
     @staticmethod
     def from_sql(field: str):
         def from_sql(
@@ -66,10 +107,7 @@ class EnumUtils:
             cursor: Cursor,
             field_type: type,
         ) -> Enum:
-            for t in get_args(field_type):
-                if issubclass(t, Enum):
-                    EnumType = t
-                    break
+            EnumType = EnumUtils.enum_type(field_type)
             return EnumUtils.resolve(sql_dict[field], EnumType)
 
         return from_sql
@@ -1,11 +1,11 @@
-from difflib import SequenceMatcher
 from enum import Enum
-from typing import get_args, get_type_hints
+from functools import cache
+from typing import get_args
 
 from mysql.connector.cursor_cext import CMySQLCursor as Cursor
 from pydantic import SerializationInfo
 
-from hogger.types import EnumUtils
+from hogger.types.enum import EnumUtils
 from hogger.util import InvalidValueException
 
 
@@ -16,39 +16,27 @@ class EnumMapUtils:
         dmap: dict[(str | int), int],
         info: SerializationInfo,
     ) -> dict[(Enum | int), int]:
-        EnumKeyType = (
-            list(
-                filter(
-                    lambda field_type: (issubclass(field_type, Enum)),
-                    get_args(get_args(get_type_hints(cls)[info.field_name])[0]),
-                ),
-            )
-        )[0]
-
-        domain = {i.name: i.value for i in EnumKeyType}
-        suggestion = None
+        domain = EnumUtils.field_domain(cls, info.field_name)
+        EnumKeyType = domain.EnumType
         result = {}
         for k, v in dmap.items():
             if isinstance(k, EnumKeyType):
                 result[k] = v
             elif isinstance(k, int):
-                if k in domain.values():
-                    result[EnumKeyType(k)] = v
-                else:
-                    result[k] = v
+                result[domain.by_value.get(k, k)] = v
             elif isinstance(k, str):
-                if k in domain:
-                    result[EnumKeyType[k]] = v
+                if k in domain.by_name:
+                    result[domain.by_name[k]] = v
+                elif k.lstrip("-").isdigit():
+                    # Integer keys come back as strings from JSON.
+                    result[domain.by_value.get(int(k), int(k))] = v
                 else:
-                    for dk in domain.keys():
-                        if SequenceMatcher(None, dk, k).ratio() >= 0.7:
-                            suggestion = dk
                     raise InvalidValueException(
                         field_name=info.field_name,
-                        expected_values=list(domain.keys()),
+                        expected_values=list(domain.by_name.keys()),
                         FieldType=EnumKeyType,
                         actual=k,
-                        suggestion=suggestion,
+                        suggestion=domain.suggest(k),
                     )
         return result
 
@@ -59,12 +47,23 @@ class EnumMapUtils:
     ) -> dict[(str | int), int]:
         result = {}
         for k, v in items.items():
-            if isinstance(k, int):
-                result[k] = v
-            else:
+            # IntEnum members are ints as well, so they're checked first.
+            if isinstance(k, Enum):
                 result[k.name] = v
+            else:
+                result[k] = v
         return result
 
+    @staticmethod
+    @cache
+    def key_type(field_type: type) -> type[Enum]:
+        """
+        Returns the Enum keying an annotation such as `dict[(ItemStat | int), int]`.
+        """
+        for t in get_args(get_args(field_type)[0]):
+            if issubclass(t, Enum):
+                return t
+
     @staticmethod
     def from_sql_named_fields(field_map: dict[str, str]):
         """
@@ -80,11 +79,9 @@ class EnumMapUtils:
             cursor: Cursor,
             field_type: type,
         ) -> dict[dict[(Enum | int), int]]:
-            EnumType = get_args(get_args(field_type)[0])[0]
             result = {}
             for sql_field, model_field in field_map.items():
                 if sql_dict[sql_field] != 0:
-                    EnumUtils.resolve(model_field, EnumType)
                     result[model_field] = sql_dict[sql_field]
             return result
 
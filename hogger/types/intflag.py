@@ -1,10 +1,11 @@
-from difflib import SequenceMatcher
-from enum import Enum, IntFlag
-from typing import get_args, get_type_hints
+from enum import IntFlag
+from functools import cache
+from typing import get_args
 
 from mysql.connector.cursor_cext import CMySQLCursor as Cursor
 from pydantic import FieldValidationInfo, SerializationInfo
 
+from hogger.types.enum import EnumUtils
 from hogger.util import InvalidValueException
 
 
@@ -31,41 +32,27 @@ class IntFlagUtils:
         items: list[IntFlag | str | int],
         info: FieldValidationInfo,
     ) -> list[IntFlag | int]:
-        IntFlagType = (
-            list(
-                filter(
-                    lambda field_type: (issubclass(field_type, Enum)),
-                    get_args(get_args(get_type_hints(cls)[info.field_name])[0]),
-                ),
-            )
-        )[0]
-        domain = {i.name: i.value for i in IntFlagType}
+        domain = EnumUtils.field_domain(cls, info.field_name)
+        IntFlagType = domain.EnumType
         result = []
-        suggestion = None
         for item in items:
             if isinstance(item, IntFlagType):
                 result.append(item)
             elif isinstance(item, int):
                 flag = 2**item
-                if flag in domain.values():
-                    result.append(IntFlagType(flag))
-                else:
-                    result.append(item)
+                result.append(domain.by_value.get(flag, item))
             elif isinstance(item, str):
-                if item in domain:
-                    result.append(IntFlagType[item])
+                if item in domain.by_name:
+                    result.append(domain.by_name[item])
                 else:
-                    # Attempt to find the nearest valid Enum value
-                    for k in domain.keys():
-                        if SequenceMatcher(None, item, k).ratio() >= 0.7:
-                            suggestion = k
-                            raise InvalidValueException(
-                                field_name=info.field_name,
-                                expected_values=list(domain.keys()),
-                                FieldType=IntFlag,
-                                actual=item,
-                                suggestion=suggestion,
-                            )
+                    raise InvalidValueException(
+                        field_name=info.field_name,
+                        expected_values=list(domain.by_name.keys()),
+                        FieldType=IntFlag,
+                        actual=item,
+                        # Attempt to find the nearest valid Enum value
+                        suggestion=domain.suggest(item),
+                    )
         return list(set(result))
 
     def serialize(
@@ -81,6 +68,24 @@ class IntFlagUtils:
                 result.append(item)
         return result
 
+    @staticmethod
+    @cache
+    def flag_type(field_type: type) -> type[IntFlag]:
+        """
+        Returns the IntFlag within an annotation such as `list[ItemFlag | int]`.
+        """
+        for t in get_args(get_args(field_type)[0]):
+            if issubclass(t, IntFlag):
+                return t
+
+    @staticmethod
+    @cache
+    def members(IntFlagType: type[IntFlag]) -> dict[int, IntFlag]:
+        """
+        Maps the value of every canonical member of `IntFlagType` to the member.
+        """
+        return {flag.value: flag for flag in IntFlagType}
+
     @staticmethod
     def from_sql(field: str):
         def from_sql(
@@ -88,16 +93,15 @@ class IntFlagUtils:
             cursor: Cursor,
             field_type: type,
         ) -> IntFlag:
-            for t in get_args(get_args(field_type)[0]):
-                if issubclass(t, IntFlag):
-                    IntFlagType = t
-                    break
-
-            if sql_dict[field] == -1:
+            members = IntFlagUtils.members(IntFlagUtils.flag_type(field_type))
+            value = sql_dict[field]
+            if value == -1:
                 flags = []
             else:
                 flags = [
-                    flag for flag in IntFlagType if flag in IntFlagType(sql_dict[field])
+                    flag
+                    for flag_value, flag in members.items()
+                    if flag_value & value == flag_value
                 ]
             return flags
 
@@ -121,7 +125,7 @@ class IntFlagUtils:
         value: int,
         IntFlagType: type[IntFlag],
     ) -> list[IntFlag | int]:
-        flags = {flag.value: flag for flag in IntFlagType}
+        flags = IntFlagUtils.members(IntFlagType)
         powers = []
         i = 1
         while i <= value:
@@ -1,11 +1,20 @@
 from .errors import InvalidValueException
-from .utils import from_sql, pydantic_annotation, to_sql
+from .metrics import Metrics, metrics
+from .suggest import SuggestionIndex
+from .utils import chunked, from_sql, pydantic_annotation, subclass_registry, to_sql
 
 __all__ = [
     # errors
     "InvalidValueException",
+    # metrics
+    "Metrics",
+    "metrics",
+    # suggest
+    "SuggestionIndex",
     # utils
+    "chunked",
     "from_sql",
     "pydantic_annotation",
+    "subclass_registry",
     "to_sql",
 ]
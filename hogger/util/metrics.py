@@ -0,0 +1,143 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator
+
+from hogger import VERSION
+
+
+class Metrics:
+    """
+    Phase timers and counters for a run of hogger, e.g. the time spent staging
+    and the number of rows loaded from the world database.
+
+    Nothing is recorded until `enable` is called, so instrumented code costs
+    next to nothing in an ordinary run. Phases nest: a phase entered while
+    another is running is reported beneath it.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # (phase, ..., nested phase) -> [seconds, calls], in the order the
+        # phases were first entered.
+        self._phases: dict[tuple[str, ...], list] = {}
+        self._counters: dict[str, int] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._phases.clear()
+            self._counters.clear()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        stack.append(name)
+        path = tuple(stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                timing = self._phases.setdefault(path, [0.0, 0])
+                timing[0] += elapsed
+                timing[1] += 1
+
+    def timed(self, name: str) -> Callable:
+        """
+        Decorates a function so that every call is timed as the phase `name`.
+        """
+
+        def decorator(f: Callable) -> Callable:
+            @wraps(f)
+            def timed(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                with self.phase(name):
+                    return f(*args, **kwargs)
+
+            return timed
+
+        return decorator
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def merge(self, counters: dict[str, int]) -> None:
+        """
+        Adds `counters`, e.g. those recorded by a worker process.
+        """
+        for name, n in counters.items():
+            self.count(name, n)
+
+    def to_dict(self) -> dict[str, any]:
+        with self._lock:
+            return {
+                "version": VERSION,
+                "phases": [
+                    {"phase": list(path), "seconds": seconds, "calls": calls}
+                    for path, (seconds, calls) in self._phases.items()
+                ],
+                "counters": dict(self._counters),
+            }
+
+    def report(self) -> str:
+        """
+        Renders the phases, each beneath the phase it ran in, and the counters
+        as a table.
+        """
+        with self._lock:
+            phases = dict(self._phases)
+            counters = dict(self._counters)
+
+        lines = [f"{'Phase':<36}{'Calls':>8}{'Seconds':>12}"]
+        for path in _tree_order(phases):
+            seconds, calls = phases[path]
+            name = "  " * (len(path) - 1) + path[-1]
+            lines.append(f"{name:<36}{calls:>8,}{seconds:>12.3f}")
+        if len(counters) > 0:
+            lines.append("")
+            lines.append(f"{'Counter':<36}{'Value':>20}")
+            for name, n in counters.items():
+                lines.append(f"{name:<36}{n:>20,}")
+        return "\n".join(lines)
+
+    def _stack(self) -> list[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+def _tree_order(phases: dict[tuple[str, ...], list]) -> list[tuple[str, ...]]:
+    # Phases are recorded as they end, so nested phases come before the phase
+    # they ran in; list every phase before the phases nested in it instead.
+    first_seen = {}
+    for path in phases:
+        for i in range(1, len(path) + 1):
+            first_seen.setdefault(path[:i], len(first_seen))
+    return sorted(
+        phases,
+        key=lambda path: [first_seen[path[:i]] for i in range(1, len(path) + 1)],
+    )
+
+
+# Records the metrics of this process.
+metrics = Metrics()
@@ -0,0 +1,44 @@
+from difflib import SequenceMatcher
+
+
+class SuggestionIndex:
+    """
+    Suggests the closest of a fixed set of names for a misspelled word.
+
+    Names are indexed by their character trigrams once. A lookup only scores
+    the few names sharing the most trigrams with the word, and returns the one
+    with the highest `SequenceMatcher` ratio at or above `cutoff`.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        cutoff: float = 0.7,
+        candidates: int = 8,
+    ) -> None:
+        self.names = list(names)
+        self.cutoff = cutoff
+        self.candidates = candidates
+        self._postings: dict[str, list[int]] = {}
+        for i, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                self._postings.setdefault(gram, []).append(i)
+
+    def suggest(self, word: str) -> str | None:
+        shared: dict[int, int] = {}
+        for gram in _trigrams(word):
+            for i in self._postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        shortlist = sorted(shared, key=shared.__getitem__, reverse=True)
+
+        best, best_ratio = None, self.cutoff
+        for i in shortlist[: self.candidates]:
+            ratio = SequenceMatcher(None, word, self.names[i]).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = self.names[i], ratio
+        return best
+
+
+def _trigrams(word: str) -> set[str]:
+    padded = f"  {word.lower()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
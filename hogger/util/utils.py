@@ -1,6 +1,7 @@
-from typing import Union
+from typing import Annotated, Union, get_args
 
 from mysql.connector.cursor_cext import CMySQLCursor as Cursor
+from pydantic import BeforeValidator, Field
 
 
 def _get_all_subclasses(cls) -> list[type]:
@@ -11,12 +12,51 @@ def _get_all_subclasses(cls) -> list[type]:
     return subclasses
 
 
-def pydantic_annotation(cls) -> type:
-    subclasses = _get_all_subclasses(cls)
-    FinalType = Union[subclasses[0], subclasses[1]]
-    for subclass in subclasses[2:]:
-        FinalType = Union[FinalType, subclass]
-    return FinalType
+def subclass_registry(cls, tag: str = "type") -> dict[str, type]:
+    """
+    Maps each value of the `tag` literal field to the subclass of `cls` that
+    declares it. A subclass that inherits its parent's tag, such as `Weapon`,
+    can't be told apart from its parent and is left out.
+    """
+    registry = {}
+    for subclass in _get_all_subclasses(cls):
+        for value in get_args(subclass.model_fields[tag].annotation):
+            registry.setdefault(value, subclass)
+    return registry
+
+
+def pydantic_annotation(cls, tag: str = "type") -> type:
+    """
+    Annotation validating any registered subclass of `cls`, as a union tagged
+    by the `tag` field: the subclass to validate is looked up by the tag's
+    value, instead of trying every subclass in turn.
+
+    Input without a tag takes the default tag of the first subclass that has
+    one.
+    """
+    registry = subclass_registry(cls, tag)
+    subclasses = list(dict.fromkeys(registry.values()))
+    default = next(
+        (
+            subclass.model_fields[tag].default
+            for subclass in subclasses
+            if not subclass.model_fields[tag].is_required()
+        ),
+        None,
+    )
+
+    def default_tag(value: any) -> any:
+        if default is not None and isinstance(value, dict) and tag not in value:
+            return {**value, tag: default}
+        return value
+
+    if len(subclasses) == 1:
+        return Annotated[subclasses[0], BeforeValidator(default_tag)]
+    return Annotated[
+        Union[tuple(subclasses)],
+        Field(discriminator=tag),
+        BeforeValidator(default_tag),
+    ]
 
 
 def from_sql(sql_field: str):
@@ -40,3 +80,11 @@ def to_sql(sql_field: str):
         return {sql_field: model_dict[model_field]}
 
     return to_sql
+
+
+def chunked(items: list, size: int):
+    """
+    Yields successive slices of `items`, each holding at most `size` elements.
+    """
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
@@ -0,0 +1,72 @@
+import json
+import pstats
+
+import pytest
+
+from hogger.cli.profiling import instrumented
+from hogger.entities import Item
+from hogger.util import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    yield
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_timings_report_phases_and_counters(fake_cnx, world_table, capsys):
+    table = fake_cnx.tables.setdefault("item_template", {})
+    for db_key in range(60000, 60005):
+        table[db_key] = Item(id=db_key, name=f"Item {db_key}").to_sql_dict()
+        fake_cnx.hoggerstate.append((1, f"Item {db_key}", db_key, None))
+
+    with instrumented(timings="-"):
+        wt = world_table()
+        wt.add_desired(Item(name="Item 60000", quality="Rare"))
+        wt.stage()
+        wt.apply()
+
+    counters = metrics.counters()
+    assert counters["hoggerstate rows"] == 5
+    assert counters["rows loaded"] == 5
+    assert counters["statements executed"] > 0
+    assert counters["bytes sent"] > 0
+    phases = [tuple(p["phase"]) for p in metrics.to_dict()["phases"]]
+    assert ("total", "stage", "load actual state") in phases
+    assert ("total", "apply") in phases
+
+    report = capsys.readouterr().err.splitlines()
+    assert report[1].startswith("Phase")
+    names = [line[:36].rstrip() for line in report]
+    # Nested phases are listed beneath, and indented under, the phase they ran
+    # in.
+    assert names.index("  stage") < names.index("    load actual state")
+
+
+def test_timings_are_written_as_json(tmp_path):
+    path = tmp_path / "timings.json"
+    with instrumented(timings=str(path)):
+        metrics.count("entities validated", 3)
+    timings = json.loads(path.read_text())
+    assert timings["counters"] == {"entities validated": 3}
+    assert timings["phases"][0]["phase"] == ["total"]
+
+
+def test_profile_is_written_for_pstats_or_speedscope(tmp_path):
+    def work():
+        return sum(i * i for i in range(10000))
+
+    with instrumented(profile=str(tmp_path / "run.prof")):
+        work()
+    stats = pstats.Stats(str(tmp_path / "run.prof"))
+    assert any(name == "work" for _, _, name in stats.stats)
+
+    with instrumented(profile=str(tmp_path / "run.json")):
+        work()
+    profile = json.loads((tmp_path / "run.json").read_text())
+    names = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert "work" in names
+    (sampled,) = profile["profiles"]
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    assert not metrics.enabled
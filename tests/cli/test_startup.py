@@ -0,0 +1,9 @@
+from benchmarks.bench_startup import heavy_imports
+
+# `hogger version` only needs argparse; importing the engine, the database
+# driver and the entity models took it well over half a second. How long it
+# takes is measured by benchmarks/bench_startup.py.
+
+
+def test_version_imports_nothing_heavy():
+    assert heavy_imports() == []
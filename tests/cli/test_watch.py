@@ -0,0 +1,122 @@
+from contextlib import ExitStack
+
+from hogger.cli.watch import WatchSession, watch
+from hogger.engine import Watcher, discover_hoggerfiles
+from hogger.engine.watcher import Changes
+
+
+def write_items(path, *names: str) -> None:
+    path.write_text(
+        "apiVersion: 1.0.1\nentities:\n"
+        + "".join(f"  - type: Item\n    name: {name}\n" for name in names),
+    )
+
+
+def item_selects(fake_cnx) -> list[tuple]:
+    return [p for s, p in fake_cnx.statements if "FROM `item_template`" in s]
+
+
+def test_changed_file_restages_only_its_entities(fake_cnx, world_table, tmp_path):
+    write_items(tmp_path / "a.hogger", "Sword", "Shield")
+    write_items(tmp_path / "b.hogger", "Staff")
+    wt = world_table()
+    session = WatchSession(wt)
+    session.load(discover_hoggerfiles(str(tmp_path)))
+    wt.stage()
+    wt.apply()
+    assert sorted(wt._created[1]) == ["Shield", "Staff", "Sword"]
+    for item in wt._created[1].values():
+        fake_cnx.tables.setdefault("item_template", {})[item.id] = item.to_sql_dict()
+
+    # Shield is renamed to Buckler.
+    write_items(tmp_path / "a.hogger", "Sword", "Buckler")
+    (changed,) = [f for f in discover_hoggerfiles(str(tmp_path)) if "a." in f.path]
+    scope = session.load([changed])
+    assert scope == {1: {"Sword", "Shield", "Buckler"}}
+    fake_cnx.statements.clear()
+    wt.stage(scope)
+    assert list(wt._created[1]) == ["Buckler"]
+    assert list(wt._deleted[1]) == ["Shield"]
+    assert list(wt._unchanged[1]) == ["Sword"]
+    # Sword's content_hash matches, so only Shield is read back.
+    assert len(item_selects(fake_cnx)) == 1
+
+
+def test_removed_file_deletes_its_entities(fake_cnx, world_table, tmp_path):
+    write_items(tmp_path / "a.hogger", "Sword")
+    write_items(tmp_path / "b.hogger", "Staff")
+    wt = world_table()
+    session = WatchSession(wt)
+    session.load(discover_hoggerfiles(str(tmp_path)))
+    wt.stage()
+    wt.apply()
+    for item in wt._created[1].values():
+        fake_cnx.tables.setdefault("item_template", {})[item.id] = item.to_sql_dict()
+
+    scope = session.remove([str(tmp_path / "b.hogger")])
+    wt.stage(scope)
+    assert list(wt._deleted[1]) == ["Staff"]
+    assert len(wt._unchanged[1]) == 0
+    assert len(wt._created[1]) == 0
+
+
+def test_unparsable_file_keeps_its_entities(fake_cnx, world_table, tmp_path, capsys):
+    write_items(tmp_path / "a.hogger", "Sword")
+    wt = world_table()
+    session = WatchSession(wt)
+    session.load(discover_hoggerfiles(str(tmp_path)))
+
+    (tmp_path / "a.hogger").write_text("apiVersion: 1.0.1\nentities: [{type: Spoon}]\n")
+    assert session.load(discover_hoggerfiles(str(tmp_path))) == {}
+    assert "Unable to parse" in capsys.readouterr().err
+    assert list(wt._desired_state[1]) == ["Sword"]
+
+
+def test_failed_changes_keep_watching(
+    fake_cnx,
+    world_table,
+    tmp_path,
+    monkeypatch,
+    capsys,
+):
+    write_items(tmp_path / "a.hogger", "Sword")
+    waits = iter([Changes([], [str(tmp_path / "b.hogger")]), KeyboardInterrupt])
+
+    def wait(self):
+        result = next(waits)
+        if result is KeyboardInterrupt:
+            raise result
+        return result
+
+    def fail(*args, **kwargs):
+        raise ValueError("bad save")
+
+    monkeypatch.setattr(Watcher, "wait", wait)
+    monkeypatch.setattr("hogger.cli.watch.apply_changes", fail)
+    with ExitStack() as stack:
+        watch(world_table(), stack, str(tmp_path), use_cache=False, plan="summary")
+    assert next(waits, None) is None
+    out, err = capsys.readouterr()
+    assert "Unable to apply changes:\nbad save" in err
+    assert "Stopped watching." in out
+
+
+def test_failed_apply_is_rolled_back(fake_cnx, world_table, tmp_path, monkeypatch):
+    write_items(tmp_path / "a.hogger", "Sword")
+    waits = iter([str(tmp_path / "b.hogger"), KeyboardInterrupt])
+
+    def wait(self):
+        result = next(waits)
+        if result is KeyboardInterrupt:
+            raise result
+        write_items(tmp_path / "b.hogger", "Staff")
+        fake_cnx.fail_on = "INSERT INTO `hoggerstate`"
+        return Changes(discover_hoggerfiles(result), [])
+
+    monkeypatch.setattr(Watcher, "wait", wait)
+    with ExitStack() as stack:
+        watch(world_table(), stack, str(tmp_path), use_cache=False, plan="summary")
+    # Staff's item_template row was written before the failure, and rolled back.
+    assert fake_cnx.rollbacks > 0
+    assert [row[1] for row in fake_cnx.hoggerstate] == ["Sword"]
+    assert not any("Staff" in str(params) for _, params in fake_cnx.writes())
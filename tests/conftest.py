@@ -0,0 +1,195 @@
+import re
+
+import mysql.connector.pooling
+import pytest
+
+from hogger.engine import WorldTable
+
+
+class FakeCursor:
+    def __init__(self, cnx: "FakeConnection") -> None:
+        self._cnx = cnx
+        self._rows = []
+        self.column_names = ()
+        self.rowcount = -1
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def execute(self, operation: str, params: tuple = ()) -> None:
+        operation = " ".join(operation.split())
+        self._cnx.statements.append((operation, tuple(params or ())))
+        self._cnx.check(operation)
+        self.column_names, self._rows = self._cnx.respond(operation, params)
+        self.rowcount = len(self._rows)
+
+    def executemany(self, operation: str, seq_params: list[tuple]) -> None:
+        operation = " ".join(operation.split())
+        self._cnx.statements.append((operation, list(seq_params)))
+        self._cnx.check(operation)
+        self.column_names, self._rows = self._cnx.respond(operation, ())
+
+    def fetchall(self) -> list[tuple]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self) -> tuple:
+        return self._rows.pop(0) if len(self._rows) > 0 else None
+
+
+class FakeConnection:
+    """
+    Stands in for a mysql.connector connection. Every statement is recorded in
+    `statements`, and reads are answered from `hoggerstate` and `tables`.
+    """
+
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, tuple]] = []
+        self.commits = 0
+        self.rollbacks = 0
+        self._committed = 0
+        # Statements starting with this fail, once issued.
+        self.fail_on: str = None
+        self.checkouts = 0
+        self.pools = 0
+        self.prepared = 0
+        self.locked = False
+        self.hoggerstate: list[tuple[int, str, int]] = []
+        # table name -> {db_key: {column: value}}
+        self.tables: dict[str, dict[int, dict[str, any]]] = {}
+
+    def cursor(self, prepared: bool = False, **kwargs) -> FakeCursor:
+        self.prepared += prepared
+        return FakeCursor(self)
+
+    def connect(self, **kwargs) -> "FakeConnection":
+        self.checkouts += 1
+        return self
+
+    def is_connected(self) -> bool:
+        return True
+
+    def commit(self) -> None:
+        self.commits += 1
+        # Committed hoggerstate rows are visible to later reads.
+        for operation, params in self.statements[self._committed :]:
+            seq_params = params if isinstance(params, list) else [params]
+            if operation.startswith("INSERT INTO `hoggerstate`"):
+                params = [value for row in seq_params for value in row]
+                for i in range(0, len(params), 4):
+                    self._upsert_hoggerstate(tuple(params[i : i + 4]))
+            elif operation.startswith("DELETE FROM `hoggerstate`"):
+                for entity_code, *hogger_ids in seq_params:
+                    self.hoggerstate = [
+                        row
+                        for row in self.hoggerstate
+                        if row[0] != entity_code or row[1] not in hogger_ids
+                    ]
+        self._committed = len(self.statements)
+
+    def _upsert_hoggerstate(self, row: tuple[int, str, int, str]) -> None:
+        for i, existing in enumerate(self.hoggerstate):
+            if existing[:2] == row[:2]:
+                self.hoggerstate[i] = row
+                return
+        self.hoggerstate.append(row)
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+        del self.statements[self._committed :]
+
+    def check(self, operation: str) -> None:
+        if self.fail_on is not None and operation.startswith(self.fail_on):
+            raise mysql.connector.errors.DatabaseError(f"{self.fail_on} failed")
+
+    def close(self) -> None:
+        pass
+
+    def respond(self, operation: str, params: tuple) -> tuple[tuple, list]:
+        if operation.startswith("SELECT entity_code, hogger_identifier, db_key"):
+            return ("entity_code", "hogger_identifier", "db_key"), self.hoggerstate
+        if "FROM information_schema.tables" in operation:
+            return ("table_name",), [("hoggerlock",)]
+        if "FROM hoggerlock" in operation:
+            return ("k", "v"), [("locked", int(self.locked))]
+        if operation.startswith("UPDATE hoggerlock SET v = 1"):
+            if self.locked:
+                return (), []
+            self.locked = True
+            return (), [()]
+
+        bounds = re.search(r"FROM `(\w+)` WHERE `\w+` BETWEEN", operation)
+        if bounds is not None:
+            low, high = params
+            table = self.tables.get(bounds.group(1), {})
+            keys = [None, *sorted(k for k in table if low <= k <= high), None]
+            rows = [
+                (keys[i], keys[i - 1], keys[i + 1])
+                for i in range(1, len(keys) - 1)
+                if None in (keys[i - 1], keys[i + 1]) or keys[i + 1] > keys[i] + 1
+            ]
+            return ("k", "prev_k", "next_k"), rows
+
+        select = re.match(r"SELECT \* FROM `?(\w+)`? WHERE .* IN \(", operation)
+        if select is not None:
+            table = self.tables.get(select.group(1), {})
+            rows = [table[key] for key in params if key in table]
+            if len(rows) == 0:
+                return (), []
+            return tuple(rows[0].keys()), [tuple(row.values()) for row in rows]
+        return (), []
+
+    def writes(self) -> list[tuple[str, tuple]]:
+        return [
+            (operation, params)
+            for operation, params in self.statements
+            if operation.startswith(("INSERT", "REPLACE", "DELETE"))
+        ]
+
+
+class FakePool:
+    """
+    Stands in for a MySQLConnectionPool; every connection it hands out is the
+    same FakeConnection.
+    """
+
+    def __init__(self, cnx: FakeConnection, pool_size: int, **kwargs) -> None:
+        self._cnx = cnx
+        self.pool_size = pool_size
+        cnx.pools += 1
+
+    def get_connection(self) -> FakeConnection:
+        return self._cnx.connect()
+
+
+@pytest.fixture
+def fake_cnx(monkeypatch) -> FakeConnection:
+    cnx = FakeConnection()
+    monkeypatch.setattr(mysql.connector, "connect", cnx.connect)
+    monkeypatch.setattr(
+        mysql.connector.pooling,
+        "MySQLConnectionPool",
+        lambda **kwargs: FakePool(cnx, **kwargs),
+    )
+    return cnx
+
+
+@pytest.fixture
+def world_table(fake_cnx):
+    def world_table(**kwargs) -> WorldTable:
+        return WorldTable(
+            host="localhost",
+            port=3306,
+            database="acore_world",
+            user="acore",
+            password="acore",
+            **kwargs,
+        )
+
+    return world_table
@@ -0,0 +1,54 @@
+from hogger.engine import BatchWriter, Statements
+
+
+def test_groups_rows_by_table_and_columns(fake_cnx):
+    with BatchWriter(Statements(fake_cnx)) as writer:
+        for i in range(10):
+            writer.add("item_template", {"entry": i, "name": f"Item {i}"})
+            writer.add("hoggerstate", {"entity_code": 1, "db_key": i})
+        writer.add("item_template", {"entry": 11})
+
+    assert writer.statements_executed == 3
+    operation, params = fake_cnx.writes()[0]
+    assert operation.startswith("INSERT INTO `item_template` (`entry`, `name`)")
+    assert operation.endswith(
+        "ON DUPLICATE KEY UPDATE `entry`=VALUES(`entry`), `name`=VALUES(`name`);",
+    )
+    assert len(params) == 20
+
+
+def test_flushes_on_row_limit(fake_cnx):
+    with BatchWriter(Statements(fake_cnx), max_rows=1000) as writer:
+        for i in range(20000):
+            writer.add("item_template", {"entry": i})
+    assert len(fake_cnx.writes()) == 20
+
+
+def test_flushes_on_byte_limit(fake_cnx):
+    with BatchWriter(Statements(fake_cnx), max_bytes=1000) as writer:
+        for i in range(100):
+            writer.add("item_template", {"entry": i, "name": "x" * 90})
+    assert len(fake_cnx.writes()) > 1
+    for operation, params in fake_cnx.writes():
+        assert sum(len(str(p)) for p in params) <= 1000
+
+
+def test_values_are_parameterized(fake_cnx):
+    with BatchWriter(Statements(fake_cnx)) as writer:
+        writer.add("item_template", {"entry": 1, "name": "Hogger's Claw"})
+    operation, params = fake_cnx.writes()[0]
+    assert "Hogger's Claw" not in operation
+    assert params == (1, "Hogger's Claw")
+
+
+def test_full_batches_share_one_prepared_statement(fake_cnx):
+    statements = Statements(fake_cnx)
+    columns = tuple(f"c{i}" for i in range(140))
+    rows = [tuple(range(140))] * 1000
+    assert statements.upsert("item_template", columns, rows) == 3
+
+    full, remainder = fake_cnx.writes()
+    # executemany over two full batches of 468 rows, then the remainder.
+    assert len(full[1]) == 2
+    assert len(full[1][0]) == Statements.max_rows(columns) * len(columns)
+    assert len(remainder[1]) == (1000 - 2 * 468) * 140
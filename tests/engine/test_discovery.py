@@ -0,0 +1,91 @@
+import os
+
+from hogger.engine import discover_hoggerfiles, get_hoggerfiles
+
+
+def make_tree(root, paths: list[str]) -> None:
+    for path in paths:
+        full = root / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_text("")
+
+
+def relative(root, hoggerfiles) -> list[str]:
+    return [os.path.relpath(f.path, root).replace(os.sep, "/") for f in hoggerfiles]
+
+
+def test_walks_requested_root_in_sorted_order(tmp_path, monkeypatch):
+    make_tree(tmp_path, ["b.hogger", "a/z.hogger", "a/b/c.hogger", "a/readme.md"])
+    # The working directory has nothing to do with it.
+    monkeypatch.chdir(tmp_path / "a")
+    found = discover_hoggerfiles(str(tmp_path))
+    assert relative(tmp_path, found) == ["a/b/c.hogger", "a/z.hogger", "b.hogger"]
+    assert get_hoggerfiles(str(tmp_path)) == [f.path for f in found]
+
+
+def test_prunes_ignored_paths(tmp_path):
+    make_tree(
+        tmp_path,
+        [
+            ".git/x.hogger",
+            "node_modules/pkg/x.hogger",
+            "build/x.hogger",
+            "items/keep.hogger",
+            "items/draft.hogger",
+            "items/drafts/final.hogger",
+            "items/old/x.hogger",
+            "src/build/x.hogger",
+        ],
+    )
+    (tmp_path / ".gitignore").write_text("# deps\nnode_modules/\n/build\n")
+    (tmp_path / "items" / ".hoggerignore").write_text(
+        "draft*\n!drafts/\nold/**\n",
+    )
+    found = discover_hoggerfiles(str(tmp_path))
+    assert relative(tmp_path, found) == [
+        "items/drafts/final.hogger",
+        "items/keep.hogger",
+        # `/build` only applies at the root.
+        "src/build/x.hogger",
+    ]
+
+
+def test_threads_find_the_same_files(tmp_path):
+    make_tree(
+        tmp_path,
+        [f"{i}/{j}/{k}.hogger" for i in range(4) for j in range(4) for k in range(3)],
+    )
+    assert discover_hoggerfiles(str(tmp_path), threads=4) == discover_hoggerfiles(
+        str(tmp_path),
+    )
+
+
+def test_exposes_mtime_and_size(tmp_path):
+    path = tmp_path / "item.hogger"
+    path.write_text("apiVersion: 1.0.1\n")
+    os.utime(path, ns=(0, 123456789))
+    (found,) = discover_hoggerfiles(str(tmp_path))
+    assert (found.mtime_ns, found.size) == (123456789, 18)
+    assert discover_hoggerfiles(str(path)) == [found]
+
+
+def test_symlinked_directories_are_not_followed(tmp_path):
+    make_tree(tmp_path, ["a/item.hogger"])
+    (tmp_path / "a" / "loop").symlink_to(tmp_path, target_is_directory=True)
+    (tmp_path / "alias").symlink_to(tmp_path / "a", target_is_directory=True)
+    found = discover_hoggerfiles(str(tmp_path))
+    assert relative(tmp_path, found) == ["a/item.hogger"]
+
+
+def test_unreadable_directories_are_skipped(tmp_path, monkeypatch):
+    make_tree(tmp_path, ["item.hogger", "locked/hidden.hogger"])
+    scandir = os.scandir
+
+    def locked_scandir(path):
+        if os.path.basename(path) == "locked":
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", locked_scandir)
+    found = discover_hoggerfiles(str(tmp_path))
+    assert relative(tmp_path, found) == ["item.hogger"]
@@ -0,0 +1,58 @@
+import pytest
+
+from hogger.engine import IdAllocator, Statements
+from hogger.entities import Item
+
+
+def add_rows(fake_cnx, keys) -> None:
+    table = fake_cnx.tables.setdefault("item_template", {})
+    for key in keys:
+        table[key] = {"entry": key}
+
+
+def allocator(fake_cnx, ranges=None) -> IdAllocator:
+    return IdAllocator(Statements(fake_cnx), ranges=ranges)
+
+
+def test_allocates_contiguous_keys_with_one_query(fake_cnx):
+    add_rows(fake_cnx, [60000, 60001, 60005, 60006, 70000])
+    ids = allocator(fake_cnx)
+    assert ids.allocate(1, 3) == [60002, 60003, 60004]
+    # The gap below 70000 is too small, so the keys come from above it.
+    assert ids.allocate(1, 10_000) == list(range(70001, 80001))
+    assert ids.allocate(1, 1) == [60007]
+    assert len(fake_cnx.statements) == 1
+
+
+def test_fills_gaps_when_no_range_fits(fake_cnx):
+    add_rows(fake_cnx, [10, 12, 14])
+    ids = allocator(fake_cnx, ranges={1: (10, 15)})
+    assert ids.allocate(1, 3) == [11, 13, 15]
+    with pytest.raises(IdAllocator.RangeExhausted):
+        ids.allocate(1, 1)
+
+
+def test_reserved_keys_are_skipped(fake_cnx):
+    ids = allocator(fake_cnx, ranges={1: (100, 199)})
+    ids.reserve(1, [100, 102, 500])
+    assert ids.allocate(1, 2) == [103, 104]
+    assert ids.allocate(1, 1) == [101]
+
+
+def test_stage_allocates_created_entities(fake_cnx, world_table):
+    add_rows(fake_cnx, [60000])
+    wt = world_table()
+    wt.add_desired(
+        Item(name="Pinned", id=60001),
+        *[Item(name=f"New {i}") for i in range(5)],
+    )
+    wt.stage()
+    created = wt._created[1]
+    assert created["Pinned"].id == 60001
+    assert [created[f"New {i}"].id for i in range(5)] == list(range(60002, 60007))
+
+
+def test_lock_is_exclusive(fake_cnx, world_table):
+    wt = world_table()
+    assert wt.acquire_lock()
+    assert not wt.acquire_lock()
@@ -0,0 +1,156 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from hogger.engine import Manifest, ParseCache, discover_hoggerfiles
+from hogger.engine.manifest import EntityTypes
+from hogger.entities import Item
+from hogger.entities.item.weapon import Bow, Weapon
+
+
+def write_manifests(tmp_path, count: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"{i}.hogger"
+        path.write_text(
+            "apiVersion: 1.0.1\n"
+            "entities:\n"
+            f"  - type: Item\n"
+            f"    name: Item {i}\n"
+            f"    quality: Rare\n"
+            f"    flags: [HasLoot]\n",
+        )
+        paths.append(str(path))
+    return paths
+
+
+def test_from_files_in_parallel_keeps_order(tmp_path):
+    paths = write_manifests(tmp_path, 6)
+    serial = list(Manifest.from_files(paths))
+    parallel = list(Manifest.from_files(paths, jobs=2))
+    assert [m.entities[0].name for m in parallel] == [f"Item {i}" for i in range(6)]
+    assert parallel == serial
+
+
+def test_parse_cache_skips_parsing(tmp_path, monkeypatch):
+    (path,) = write_manifests(tmp_path, 1)
+    cache = Manifest.parse_cache(str(tmp_path / "cache"))
+    first = Manifest.from_file(path, cache=cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("manifest was parsed again")
+
+    monkeypatch.setattr("hogger.engine.manifest.yaml.load", fail)
+    assert Manifest.from_file(path, cache=cache) == first
+
+
+def test_parse_cache_round_trips_entities(tmp_path):
+    path = tmp_path / "bow.hogger"
+    path.write_text(
+        "apiVersion: 1.0.1\n"
+        "entities:\n"
+        "  - type: Bow\n"
+        "    name: Bow\n"
+        "    tag: epic\n"
+        "    stats: {Agility: 5, 250: 1}\n"
+        "    resistances: {Fire: 3}\n"
+        "    sockets: {meta: 44}\n",
+    )
+    cache = Manifest.parse_cache(str(tmp_path / "cache"))
+    (parsed,) = Manifest.from_file(str(path), cache=cache).entities
+    (cached,) = Manifest.from_file(str(path), cache=cache).entities
+    assert type(cached) is Bow
+    assert cached == parsed
+    assert cached.to_sql_dict() == parsed.to_sql_dict()
+
+
+def test_parse_cache_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=1000)
+    for i in range(20):
+        cache.put(cache.key(str(i).encode()), "x" * 100)
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 1000
+    assert cache.get(cache.key(b"19")) == "x" * 100
+    assert cache.get(cache.key(b"0")) is None
+
+
+def test_parse_cache_drops_unloadable_entries(tmp_path):
+    (path,) = write_manifests(tmp_path, 1)
+    cache = Manifest.parse_cache(str(tmp_path / "cache"))
+    with open(path, "rb") as f:
+        key = cache.key(f.read())
+    os.makedirs(cache.directory)
+
+    # Entries that aren't JSON, such as pickles, are never loaded.
+    with open(cache._path(key), "wb") as f:
+        f.write(b"cos\nsystem\n(S'exit 1'\ntR.")
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._path(key))
+
+    # Entries are validated like any hogger file.
+    cache.put(key, {"apiVersion": "1.0.1", "entities": [{"type": "Spoon"}]})
+    (item,) = Manifest.from_file(path, cache=cache).entities
+    assert item.name == "Item 0"
+    assert cache.get(key)["entities"][0]["name"] == "Item 0"
+
+
+def test_iter_file_streams_every_document(tmp_path):
+    path = tmp_path / "stream.hogger"
+    path.write_text(
+        "apiVersion: 1.0.1\n"
+        "entities:\n"
+        "  - &base\n"
+        "    type: Item\n"
+        "    name: First\n"
+        "    quality: Rare\n"
+        "  - <<: *base\n"
+        "    name: Second\n"
+        "---\n"
+        "entities:\n"
+        "  - type: Item\n"
+        "    name: Third\n"
+        "    flags: [HasLoot]\n"
+        "apiVersion: 1.0.1\n",
+    )
+    entities = list(Manifest.iter_file(str(path)))
+    assert [e.name for e in entities] == ["First", "Second", "Third"]
+    assert entities[1].quality == entities[0].quality
+
+
+def test_entities_are_dispatched_on_type():
+    manifest = Manifest(
+        apiVersion="1.0.1",
+        entities=[
+            {"type": "Bow", "name": "Bow"},
+            {"type": "Item", "name": "Item"},
+            # Items are the default.
+            {"name": "Untyped"},
+        ],
+    )
+    assert [type(e) for e in manifest.entities] == [Bow, Item, Item]
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValidationError, match="union_tag_invalid"):
+        Manifest(apiVersion="1.0.1", entities=[{"type": "Spoon", "name": "x"}])
+
+
+def test_registry_skips_untagged_subclasses():
+    assert EntityTypes["Item"] is Item
+    assert EntityTypes["Bow"] is Bow
+    assert Weapon not in EntityTypes.values()
+
+
+def test_parse_cache_skips_reading_unchanged_files(tmp_path, monkeypatch):
+    (path,) = write_manifests(tmp_path, 1)
+    # A file saved within the last few seconds is always read.
+    os.utime(path, (0, 0))
+    (hoggerfile,) = discover_hoggerfiles(str(tmp_path))
+    cache = Manifest.parse_cache(str(tmp_path / "cache"))
+    first = Manifest.from_file(path, cache=cache, stat=hoggerfile.stat)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("manifest was read again")
+
+    monkeypatch.setattr("hogger.engine.manifest.open", fail, raising=False)
+    assert Manifest.from_file(path, cache=cache, stat=hoggerfile.stat) == first
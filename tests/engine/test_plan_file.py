@@ -0,0 +1,190 @@
+import json
+import pickle
+import zlib
+
+import pytest
+
+from hogger.engine import PlanFile
+from hogger.engine.plan_file import MAGIC
+from hogger.entities import Item
+
+
+def stage_plan(fake_cnx, world_table, filepath) -> None:
+    fake_cnx.hoggerstate.append((1, "Existing", 50, None))
+    wt = world_table()
+    wt.add_desired(Item(name="New"))
+    wt.stage()
+    wt.save_plan(filepath)
+
+
+def test_plan_round_trip(fake_cnx, world_table, tmp_path):
+    filepath = str(tmp_path / "plan.bin")
+    stage_plan(fake_cnx, world_table, filepath)
+    assert PlanFile.is_plan(filepath)
+    assert not PlanFile.is_plan(str(tmp_path))
+
+    fake_cnx.statements.clear()
+    wt = world_table()
+    wt.load_plan(filepath)
+    assert wt._created[1]["New"].get_db_key() == 60000
+    wt.apply()
+    assert fake_cnx.writes()[0][0].startswith("INSERT INTO `item_template`")
+
+
+def test_plan_is_stored_as_data(fake_cnx, world_table, tmp_path):
+    filepath = str(tmp_path / "plan.bin")
+    table = fake_cnx.tables.setdefault("item_template", {})
+    for db_key, name in ((50, "Kept"), (51, "Gone"), (52, "Same")):
+        item = Item(id=db_key, name=name)
+        table[db_key] = item.to_sql_dict()
+        fake_cnx.hoggerstate.append((1, name, db_key, item.content_hash()))
+    wt = world_table()
+    wt.add_desired(Item(name="Kept", description="Changed"), Item(name="Same"))
+    wt.stage()
+    assert wt._unchanged[1] == {"Same": None}
+    wt.save_plan(filepath)
+
+    with open(filepath, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC
+        data = json.loads(zlib.decompress(f.read()))
+    assert data["modified"]["1"]["rows"].keys() == {"Kept"}
+
+    wt = world_table()
+    wt.load_plan(filepath)
+    assert wt._modified[1]["Kept"].to_sql_dict()["description"] == "Changed"
+    assert wt._changes[1]["Kept"]["description"]["desired"] == "Changed"
+    assert wt._deleted[1]["Gone"].get_db_key() == 51
+    assert wt._unchanged[1] == {"Same": None}
+
+
+def test_applied_plan_writes_what_was_staged(fake_cnx, world_table, tmp_path):
+    filepath = str(tmp_path / "plan.bin")
+
+    def hatchet() -> Item:
+        return Item(
+            name="Hatchet",
+            sockets={"meta": 44, "yellow": 42, "blue": 22},
+            randomStat={"id": 255, "withSuffix": True},
+        )
+
+    wt = world_table()
+    wt.add_desired(hatchet())
+    wt.stage()
+    wt.apply()
+    applied = fake_cnx.writes()
+
+    fake_cnx.statements.clear()
+    fake_cnx.hoggerstate.clear()
+    fake_cnx._committed = 0
+    wt = world_table()
+    wt.add_desired(hatchet())
+    wt.stage()
+    wt.save_plan(filepath)
+    fake_cnx.statements.clear()
+    wt = world_table()
+    wt.load_plan(filepath)
+    wt.apply()
+    assert fake_cnx.writes() == applied
+
+
+def test_pickled_plan_is_rejected(tmp_path):
+    filepath = str(tmp_path / "plan.bin")
+    with open(filepath, "wb") as f:
+        f.write(MAGIC)
+        f.write(zlib.compress(pickle.dumps({"version": "0"})))
+    with pytest.raises(ValueError):
+        PlanFile.load(filepath)
+
+
+def test_changed_hoggerstate_is_stale(fake_cnx, world_table, tmp_path):
+    filepath = str(tmp_path / "plan.bin")
+    stage_plan(fake_cnx, world_table, filepath)
+
+    fake_cnx.hoggerstate.append((1, "Other", 51, None))
+    with pytest.raises(PlanFile.Stale):
+        world_table().load_plan(filepath)
+
+
+def test_taken_keys_are_stale(fake_cnx, world_table, tmp_path):
+    filepath = str(tmp_path / "plan.bin")
+    stage_plan(fake_cnx, world_table, filepath)
+
+    fake_cnx.tables["item_template"] = {60000: {"entry": 60000}}
+    with pytest.raises(PlanFile.Stale):
+        world_table().load_plan(filepath)
+
+
+def test_interrupted_apply_resumes(fake_cnx, world_table, tmp_path, monkeypatch):
+    filepath = str(tmp_path / "plan.bin")
+    wt = world_table()
+    wt.add_desired(*[Item(name=f"New {i}") for i in range(25)])
+    wt.stage()
+    wt.save_plan(filepath)
+
+    commit = fake_cnx.commit
+
+    def failing_commit() -> None:
+        if fake_cnx.commits == 2:
+            raise ConnectionError("lost connection")
+        commit()
+
+    monkeypatch.setattr(fake_cnx, "commit", failing_commit)
+    wt = world_table()
+    wt.load_plan(filepath)
+    with pytest.raises(ConnectionError):
+        wt.apply(chunk_size=10)
+    assert PlanFile.read_progress(filepath, PlanFile.load(filepath))["chunks"] == 2
+    assert len(fake_cnx.hoggerstate) == 20
+
+    # A fresh run resumes with the third chunk, without staging again.
+    monkeypatch.setattr(fake_cnx, "commit", commit)
+    fake_cnx.statements.clear()
+    fake_cnx._committed = 0
+    wt = world_table()
+    wt.load_plan(filepath)
+    wt.apply(chunk_size=10)
+    (_, params), _ = fake_cnx.writes()
+    assert params[0] == 60020
+    assert len(fake_cnx.hoggerstate) == 25
+    assert PlanFile.read_progress(filepath, PlanFile.load(filepath)) is None
+
+
+def test_apply_interrupted_before_checkpoint_resumes(
+    fake_cnx,
+    world_table,
+    tmp_path,
+    monkeypatch,
+):
+    filepath = str(tmp_path / "plan.bin")
+    wt = world_table()
+    wt.add_desired(*[Item(name=f"New {i}") for i in range(25)])
+    wt.stage()
+    wt.save_plan(filepath)
+
+    write_progress = PlanFile.write_progress
+
+    def failing_write_progress(*args, **kwargs) -> None:
+        # Dies after the second chunk is committed, before it's checkpointed.
+        if kwargs["chunks"] == 2 and kwargs["next_fingerprint"] is None:
+            raise ConnectionError("killed")
+        write_progress(*args, **kwargs)
+
+    monkeypatch.setattr(PlanFile, "write_progress", failing_write_progress)
+    wt = world_table()
+    wt.load_plan(filepath)
+    with pytest.raises(ConnectionError):
+        wt.apply(chunk_size=10)
+    assert PlanFile.read_progress(filepath, PlanFile.load(filepath))["chunks"] == 1
+    assert len(fake_cnx.hoggerstate) == 20
+
+    # The second chunk was committed, so a fresh run resumes with the third.
+    monkeypatch.setattr(PlanFile, "write_progress", write_progress)
+    fake_cnx.statements.clear()
+    fake_cnx._committed = 0
+    wt = world_table()
+    wt.load_plan(filepath)
+    wt.apply(chunk_size=10)
+    (_, params), _ = fake_cnx.writes()
+    assert params[0] == 60020
+    assert len(fake_cnx.hoggerstate) == 25
+    assert PlanFile.read_progress(filepath, PlanFile.load(filepath)) is None
@@ -0,0 +1,63 @@
+import io
+import json
+
+import pytest
+
+from hogger.engine import PlanWriter
+from hogger.entities import Item
+
+
+def staged() -> dict[str, dict]:
+    modified = Item(id=60001, name="Modified")
+    return {
+        "created": {1: {"Created": Item(id=60000, name="Created")}},
+        "modified": {1: {"Modified": modified}},
+        "changes": {
+            1: {"Modified": {"quality": {"desired": 4, "actual": 3}}},
+        },
+        "unchanged": {1: {f"Unchanged {i}": None for i in range(3)}},
+        "deleted": {1: {"Deleted": Item(id=60002, name="Deleted")}},
+    }
+
+
+def render(mode: str) -> list[str]:
+    stream = io.StringIO()
+    PlanWriter(stream, mode=mode).write(**staged())
+    return stream.getvalue().splitlines()
+
+
+def test_full_lists_unchanged():
+    lines = render("full")
+    assert "  Item.Unchanged 0" in lines
+    assert "      desired: 4" in lines
+    assert lines[-1] == "Plan: 1 to create, 1 to modify, 1 to delete, 3 unchanged."
+
+
+def test_changes_omits_unchanged():
+    lines = render("changes")
+    assert not any("Unchanged" in line for line in lines)
+    assert "  Item.Deleted" in lines
+
+
+def test_summary():
+    assert render("summary") == [
+        "Plan: 1 to create, 1 to modify, 1 to delete, 3 unchanged.",
+    ]
+
+
+def test_jsonl():
+    records = [json.loads(line) for line in render("jsonl")]
+    assert [r["action"] for r in records] == ["create", "modify", "delete", "summary"]
+    assert records[0] == {
+        "action": "create",
+        "type": "Item",
+        "id": "Created",
+        "db_key": 60000,
+    }
+    assert records[1]["changes"] == {"quality": {"desired": 4, "actual": 3}}
+    assert records[-1]["unchanged"] == 3
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        PlanWriter(io.StringIO(), mode="yaml")
@@ -0,0 +1,45 @@
+import pickle
+
+from hogger.engine import RowStore
+from hogger.entities import Item
+
+
+def store_of(*items: Item) -> RowStore:
+    store = RowStore(Item)
+    for item in items:
+        row = item.to_sql_dict()
+        store.add(tuple(row), item.name, tuple(row.values()))
+    return store
+
+
+def test_materializes_on_lookup():
+    store = store_of(Item(id=60000, name="Sword", quality=3))
+    assert "Sword" in store
+    assert len(store) == 1
+    item = store["Sword"]
+    assert isinstance(item, Item)
+    assert item.id == 60000
+    assert item.quality == 3
+    assert store.db_key("Sword") == 60000
+
+
+def test_matches_desired_row():
+    store = store_of(Item(id=60000, name="Sword", quality=3))
+    assert store.matches("Sword", Item(id=60000, name="Sword", quality=3).to_sql_dict())
+    # An unpinned db_key matches any stored key.
+    assert store.matches("Sword", Item(id=-1, name="Sword", quality=3).to_sql_dict())
+    assert not store.matches(
+        "Sword",
+        Item(id=60001, name="Sword", quality=3).to_sql_dict(),
+    )
+    assert not store.matches(
+        "Sword",
+        Item(id=60000, name="Sword", quality=4).to_sql_dict(),
+    )
+
+
+def test_stored_row_round_trips():
+    store = store_of(Item(id=60000, name="Sword"))
+    stored = pickle.loads(pickle.dumps(store.stored("Sword")))
+    assert stored.get_db_key() == 60000
+    assert stored.materialize().name == "Sword"
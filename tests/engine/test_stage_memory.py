@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+from textwrap import dedent
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stages a world of `count` entities, none of which are desired anymore, so
+# all of them are loaded and classified as deleted. Runs in its own
+# interpreter so that ru_maxrss only reflects this workload.
+STAGE_SCRIPT = dedent(
+    """
+    import json, resource, sys
+    from functools import partial
+
+    import mysql.connector.pooling
+
+    from hogger.engine import WorldTable
+    from hogger.entities import Item
+    from tests.conftest import FakeConnection, FakePool
+
+    def rss_mib():
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+
+    count = int(sys.argv[1])
+    cnx = FakeConnection()
+    mysql.connector.connect = cnx.connect
+    mysql.connector.pooling.MySQLConnectionPool = partial(FakePool, cnx)
+    row = Item(id=0, name="").to_sql_dict()
+    table = cnx.tables.setdefault("item_template", {})
+    for db_key in range(count):
+        table[db_key] = {**row, "entry": db_key, "name": f"Item {db_key}"}
+        cnx.hoggerstate.append((1, f"Item {db_key}", db_key, None))
+
+    wt = WorldTable(host="", port=0, database="", user="", password="")
+    before = rss_mib()
+    wt.stage()
+    after = rss_mib()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({
+        "deleted": len(wt._deleted[1]),
+        "retained": after - before,
+        "peak": peak - before,
+    }))
+    """,
+)
+
+
+def test_stage_peak_memory():
+    count = 100_000
+    result = subprocess.run(
+        [sys.executable, "-c", STAGE_SCRIPT, str(count)],
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    usage = json.loads(result.stdout)
+    assert usage["deleted"] == count
+    # Loaded rows take roughly 1.5 KiB each as tuples; as Items, they took
+    # over 12 KiB each.
+    assert usage["peak"] * 1024 / count <= 2
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+import pytest
+
+from hogger.engine import Watcher, discover_hoggerfiles
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def watcher(request, tmp_path):
+    (tmp_path / "a.hogger").write_text("a")
+    (tmp_path / "b.hogger").write_text("b")
+    with Watcher(str(tmp_path), interval=0.05, use_inotify=request.param) as watcher:
+        yield watcher
+
+
+def test_reports_added_modified_and_removed_files(watcher, tmp_path):
+    assert [os.path.basename(f.path) for f in watcher.files] == ["a.hogger", "b.hogger"]
+    (tmp_path / "a.hogger").write_text("changed")
+    (tmp_path / "b.hogger").unlink()
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "c.hogger").write_text("c")
+
+    changes = watcher.wait(timeout=5)
+    assert sorted(os.path.basename(f.path) for f in changes.changed) == [
+        "a.hogger",
+        "c.hogger",
+    ]
+    assert changes.removed == [str(tmp_path / "b.hogger")]
+    assert watcher.wait(timeout=0.2) is None
+
+
+def test_reports_files_in_new_directories(watcher, tmp_path):
+    (tmp_path / "new").mkdir()
+    assert watcher.wait(timeout=0.5) is None
+    (tmp_path / "new" / "d.hogger").write_text("d")
+    changes = watcher.wait(timeout=5)
+    assert [f.path for f in changes.changed] == [str(tmp_path / "new" / "d.hogger")]
+
+
+def test_inotify_reports_saves_promptly(tmp_path):
+    with Watcher(str(tmp_path)) as watcher:
+        if watcher.backend != "inotify":
+            pytest.skip("inotify is unavailable")
+        saved = []
+
+        def save():
+            time.sleep(0.2)
+            (tmp_path / "item.hogger").write_text("item")
+            saved.append(time.monotonic())
+
+        threading.Thread(target=save).start()
+        changes = watcher.wait(timeout=5)
+        assert len(changes.changed) == 1
+        assert time.monotonic() - saved[0] < 0.5
+
+
+def test_reports_saves_that_keep_the_stat(tmp_path):
+    path = tmp_path / "a.hogger"
+    path.write_text("a")
+    with Watcher(str(tmp_path), interval=0.05, use_inotify=False) as watcher:
+        path.write_text("b")
+        # As if the file was saved again within the mtime of the last search.
+        watcher._files = {f.path: f for f in discover_hoggerfiles(str(tmp_path))}
+        changes = watcher.wait(timeout=5)
+        assert [f.path for f in changes.changed] == [str(path)]
+        assert watcher.wait(timeout=0.2) is None
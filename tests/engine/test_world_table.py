@@ -0,0 +1,197 @@
+import mysql.connector
+import pytest
+
+from hogger.entities import Item
+
+
+def add_items(fake_cnx, count: int, start: int = 60000, hashed: bool = False) -> None:
+    table = fake_cnx.tables.setdefault("item_template", {})
+    for db_key in range(start, start + count):
+        item = Item(id=db_key, name=f"Item {db_key}")
+        table[db_key] = item.to_sql_dict()
+        content_hash = item.content_hash() if hashed else None
+        fake_cnx.hoggerstate.append((1, item.name, db_key, content_hash))
+
+
+def item_selects(fake_cnx) -> list[str]:
+    return [s for s, _ in fake_cnx.statements if "FROM `item_template`" in s]
+
+
+def test_actual_state_loads_in_chunks(fake_cnx, world_table):
+    add_items(fake_cnx, 25)
+    wt = world_table(load_chunk_size=10, pool_size=1)
+    assert len(item_selects(fake_cnx)) == 0
+
+    wt.add_desired(*[Item(name=f"Item {60000 + i}") for i in range(25)])
+    wt.stage()
+    assert len(item_selects(fake_cnx)) == 3
+    assert len(wt._actual_state[1]) == 25
+    assert wt._actual_state[1]["Item 60007"].id == 60007
+    assert len(wt._unchanged[1]) == 25
+
+
+def test_actual_state_loads_over_pool(fake_cnx, world_table):
+    add_items(fake_cnx, 60)
+    wt = world_table(load_chunk_size=10, pool_size=2)
+    # The pool is only opened once a load needs it.
+    assert fake_cnx.pools == 0
+    prepared = fake_cnx.prepared
+
+    ids = [f"Item {60000 + i}" for i in range(60)]
+    actual = wt._get_actual_state({1: ids})
+    assert sorted(actual[1]) == sorted(ids)
+    assert actual[1]["Item 60059"].id == 60059
+    # One connection for the WorldTable, and one per thread rather than per
+    # chunk, each preparing the statement shared by its chunks once.
+    assert fake_cnx.pools == 1
+    assert 1 < fake_cnx.checkouts <= 1 + 2
+    assert fake_cnx.prepared - prepared == fake_cnx.checkouts - 1
+
+    wt._get_actual_state({1: ids})
+    assert fake_cnx.pools == 1
+
+
+def test_applying_a_plan_opens_no_pool(fake_cnx, world_table, tmp_path):
+    filepath = str(tmp_path / "plan.bin")
+    wt = world_table()
+    wt.add_desired(Item(name="New"))
+    wt.stage()
+    wt.save_plan(filepath)
+
+    wt = world_table()
+    wt.load_plan(filepath)
+    wt.apply()
+    assert fake_cnx.pools == 0
+
+
+def test_stage_skips_entities_with_matching_hash(fake_cnx, world_table):
+    add_items(fake_cnx, 10, hashed=True)
+    wt = world_table()
+    desired = [Item(name=f"Item {60000 + i}") for i in range(10)]
+    desired[3].description = "Changed"
+    wt.add_desired(*desired)
+    wt.stage()
+
+    # Only the changed item is read back from item_template.
+    ((_, params),) = [
+        (s, p) for s, p in fake_cnx.statements if "FROM `item_template`" in s
+    ]
+    assert params == (60003,)
+    assert list(wt._modified[1]) == ["Item 60003"]
+    assert len(wt._unchanged[1]) == 9
+    assert desired[0].id == 60000
+
+
+def test_apply_refreshes_stale_hashes(fake_cnx, world_table):
+    add_items(fake_cnx, 3)
+    wt = world_table()
+    wt.add_desired(*[Item(name=f"Item {60000 + i}") for i in range(3)])
+    wt.stage()
+    wt.apply()
+
+    ((operation, params),) = fake_cnx.writes()
+    assert operation.startswith("INSERT INTO `hoggerstate`")
+    assert params[3] == Item(name="Item 60000").content_hash()
+
+
+def test_apply_batches_writes(fake_cnx, world_table):
+    wt = world_table(write_batch_rows=100)
+    wt.add_desired(*[Item(id=70000 + i, name=f"New {i}") for i in range(250)])
+    wt.stage()
+    wt.apply()
+
+    writes = fake_cnx.writes()
+    # 3 statements for item_template and 3 for hoggerstate.
+    assert len(writes) == 6
+    assert all("ON DUPLICATE KEY UPDATE" in operation for operation, _ in writes)
+    assert fake_cnx.commits > 0
+
+
+def test_apply_commits_per_chunk(fake_cnx, world_table):
+    wt = world_table()
+    wt.add_desired(*[Item(id=70000 + i, name=f"New {i}") for i in range(25)])
+    wt.stage()
+    wt.apply(chunk_size=10)
+
+    assert fake_cnx.commits == 3
+    # Each chunk writes item_template and hoggerstate.
+    assert len(fake_cnx.writes()) == 6
+
+
+def test_apply_deletes_in_bulk(fake_cnx, world_table):
+    add_items(fake_cnx, 2500)
+    wt = world_table(write_batch_rows=1000)
+    wt.add_desired(Item(name="Item 60000"))
+    wt.stage()
+    assert len(wt._deleted[1]) == 2499
+    wt.apply()
+
+    deletes = [w for w in fake_cnx.writes() if w[0].startswith("DELETE")]
+    # Two full batches share a statement; the remainder gets its own.
+    assert [operation.split(" WHERE")[0] for operation, _ in deletes] == [
+        "DELETE FROM `item_template`",
+        "DELETE FROM `item_template`",
+        "DELETE FROM `hoggerstate`",
+        "DELETE FROM `hoggerstate`",
+    ]
+    operation, params = deletes[2]
+    assert "`entity_code` = %s AND `hogger_identifier` IN" in operation
+    assert params[0] == (1, *[f"Item {db_key}" for db_key in range(60001, 61001)])
+    assert [row[1] for row in fake_cnx.hoggerstate] == ["Item 60000"]
+    assert len(wt._hoggerstate[1]) == 1
+
+
+def test_apply_keeps_rows_shared_with_kept_entities(fake_cnx, world_table):
+    add_items(fake_cnx, 1, hashed=True)
+    fake_cnx.hoggerstate.append((1, "Duplicate", 60000, None))
+    wt = world_table()
+    wt.add_desired(Item(name="Item 60000"))
+    wt.stage()
+    assert list(wt._deleted[1]) == ["Duplicate"]
+    wt.apply()
+
+    deletes = [w for w in fake_cnx.writes() if w[0].startswith("DELETE")]
+    # Only the hoggerstate row of the deleted identifier goes.
+    assert deletes == [
+        (
+            "DELETE FROM `hoggerstate` WHERE `entity_code` = %s AND "
+            "`hogger_identifier` IN (%s);",
+            (1, "Duplicate"),
+        ),
+    ]
+    assert [row[1] for row in fake_cnx.hoggerstate] == ["Item 60000"]
+    assert list(wt._hoggerstate[1]) == ["Item 60000"]
+
+
+def test_failed_apply_is_rolled_back(fake_cnx, world_table):
+    add_items(fake_cnx, 1, hashed=True)
+    wt = world_table()
+    wt.add_desired(Item(name="New"))
+    wt.stage()
+    fake_cnx.fail_on = "INSERT INTO `hoggerstate`"
+    with pytest.raises(mysql.connector.errors.DatabaseError):
+        wt.apply()
+
+    # The deletion and the write issued before the failure are discarded, so
+    # the next commit on the connection doesn't include them.
+    assert fake_cnx.rollbacks == 1
+    assert fake_cnx.writes() == []
+    assert fake_cnx.commits == 0
+    assert [row[1] for row in fake_cnx.hoggerstate] == ["Item 60000"]
+
+
+def test_stage_diffs_on_process_pool(fake_cnx, world_table, monkeypatch):
+    monkeypatch.setattr("hogger.engine.world_table.PARALLEL_DIFF_MIN", 1)
+    add_items(fake_cnx, 20)
+    wt = world_table(diff_jobs=2)
+    desired = [Item(name=f"Item {60000 + i}") for i in range(20)]
+    for item in desired[::2]:
+        item.description = "Changed"
+    wt.add_desired(*desired)
+    wt.stage()
+
+    assert list(wt._modified[1]) == [item.name for item in desired[::2]]
+    assert wt._modified[1]["Item 60004"].description == "Changed"
+    assert wt._modified[1]["Item 60004"].id == 60004
+    assert len(wt._unchanged[1]) == 10
+    assert desired[1].id == 60001
@@ -0,0 +1,24 @@
+from hogger.entities import Item, codec_plan
+
+
+def test_plan_is_compiled_once():
+    assert codec_plan(Item) is codec_plan(Item)
+    fields = [field for field, _, _ in codec_plan(Item).from_sql]
+    assert "tag" not in fields
+    assert "quality" in fields
+
+
+def test_row_round_trip():
+    item = Item(
+        id=60000,
+        name="Hogger's Claw",
+        quality="Rare",
+        flags=["IsHeroic", "HasLoot"],
+        stats={"Agility": 5, "Stamina": 10},
+        resistances={"Fire": 3},
+    )
+    row = item.to_sql_dict()
+    (loaded,) = Item.from_sql_rows(tuple(row.keys()), [tuple(row.values())])
+    assert loaded.to_sql_dict() == row
+    assert set(loaded.flags) == set(item.flags)
+    assert loaded.stats == item.stats
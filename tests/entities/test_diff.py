@@ -0,0 +1,44 @@
+from hogger.entities import Item, diff_plan
+from hogger.entities.item import ItemSpell
+
+
+def test_flag_order_is_ignored():
+    desired = Item(name="a", flags=["IsHeroic", "HasLoot"], bagFamily=["Herbs"])
+    actual = Item(name="a", flags=["HasLoot", "IsHeroic"], bagFamily=["Herbs"])
+    assert desired.diff(actual)[1] == {}
+
+
+def test_stat_maps_compare_as_dicts():
+    desired = Item(name="a", stats={"Agility": 5, "Stamina": 10})
+    actual = Item(name="a", stats={"Stamina": 10, "Agility": 5})
+    assert desired.diff(actual)[1] == {}
+
+    actual = Item(name="a", stats={"Stamina": 10, "Agility": 6})
+    assert list(desired.diff(actual)[1]) == ["stats"]
+
+
+def test_nested_models_are_walked():
+    desired = Item(name="a", spells=[ItemSpell(id=1)], requires={"level": 10})
+    actual = Item(name="a", spells=[ItemSpell(id=2)], requires={"level": 10})
+    _, diffs = desired.diff(actual)
+    assert list(diffs) == ["spells"]
+
+    actual = Item(name="a", spells=[ItemSpell(id=1)], requires={"level": 11})
+    _, diffs = desired.diff(actual)
+    assert list(diffs) == ["requires"]
+    assert actual.requires.level == 10
+
+
+def test_unchanged_diff_compares_canonical_tuples():
+    plan = diff_plan(Item)
+    converted = [field for field, _ in plan._converted]
+    # Scalars and integer enums are already canonical, and are fetched in one
+    # itemgetter call; only the other fields are converted.
+    assert {"id", "name", "quality"}.isdisjoint(converted)
+    assert {"flags", "stats", "spells", "requires"} <= set(converted)
+
+    item = Item(name="Item", flags=["IsHeroic"], stats={"Agility": 5})
+    copy = item.model_copy(deep=True)
+    # An unchanged entity is settled by comparing two hashable tuples.
+    assert hash(plan.canonical(item)) == hash(plan.canonical(copy))
+    assert plan.diff(item, copy) == []
@@ -0,0 +1,71 @@
+from difflib import SequenceMatcher
+
+import pytest
+
+from hogger.entities import Item
+from hogger.entities.item import ItemFlag, ItemResistance, ItemStat, Quality
+from hogger.types import EnumUtils
+from hogger.util import InvalidValueException
+
+
+def test_field_domain_is_memoized():
+    domain = EnumUtils.field_domain(Item, "quality")
+    assert domain is EnumUtils.field_domain(Item, "quality")
+    assert domain.EnumType is Quality
+    assert domain.by_name["Rare"] is Quality.Rare
+    assert domain.by_value[3] is Quality.Rare
+
+
+def test_field_domain_resolves_containers():
+    assert EnumUtils.field_domain(Item, "flags").EnumType is ItemFlag
+    assert EnumUtils.field_domain(Item, "stats").EnumType is ItemStat
+    assert EnumUtils.field_domain(Item, "resistances").EnumType is ItemResistance
+
+
+def test_parse_values():
+    item = Item(
+        name="Hogger's Claw",
+        quality=3,
+        flags=["HasLoot", 5],
+        stats={"Agility": 1, 7: 2},
+    )
+    assert item.quality is Quality.Rare
+    assert set(item.flags) == {ItemFlag.HasLoot, ItemFlag.NoUserDestroy}
+    assert item.stats == {ItemStat.Agility: 1, ItemStat.Stamina: 2}
+
+
+def test_parse_invalid_name():
+    with pytest.raises(InvalidValueException, match="Did you mean 'Rare'"):
+        Item(name="Hogger's Claw", quality="Rrae")
+
+
+def test_suggests_best_match():
+    domain = EnumUtils.field_domain(Item, "stats")
+    assert domain.suggest("MeleeHitRatin") == "MeleeHitRating"
+    assert domain.suggest("SpellCritRating") == "SpellCritRating"
+    assert domain.suggest("Zzzzzz") is None
+
+
+def test_unknown_flag_name_is_rejected():
+    with pytest.raises(InvalidValueException, match="Did you mean 'HasLoot'"):
+        Item(name="Hogger's Claw", flags=["HasLot"])
+    with pytest.raises(InvalidValueException):
+        Item(name="Hogger's Claw", flags=["NotAFlagAtAll"])
+
+
+def test_suggestions_only_score_a_shortlist(monkeypatch):
+    domain = EnumUtils.field_domain(Item, "stats")
+    domain.suggest("warmup")
+    index = domain._suggestions
+    scored = []
+
+    def matcher(isjunk, word: str, name: str) -> SequenceMatcher:
+        scored.append(name)
+        return SequenceMatcher(isjunk, word, name)
+
+    monkeypatch.setattr("hogger.util.suggest.SequenceMatcher", matcher)
+    assert domain.suggest("SpellPowr") == "SpellPower"
+    # The index is built once, and only the names sharing the most trigrams
+    # with the word are scored.
+    assert domain._suggestions is index
+    assert 0 < len(scored) <= index.candidates < len(index.names)